@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Asyncio Subprocess Backend for solc / echidna
+Runs many processes from one event loop (no thread per process), streams
+stdout, enforces per-task timeouts and kills the whole process group on
+timeout, early stop or cancellation (Ctrl-C), so no echidna/solc children
+are left behind.
+"""
+
+import os
+import signal
+import asyncio
+import threading
+import contextlib
+import subprocess
+from typing import List, Callable, Optional, Tuple
+
+# Grace period between SIGTERM and SIGKILL for a process group
+KILL_GRACE = 2.0
+
+def kill_process_group(process: subprocess.Popen, grace: float = KILL_GRACE):
+    """
+    Sync counterpart for Popen started with start_new_session=True:
+    SIGTERM the group, then SIGKILL whatever is still alive
+    """
+    if process.poll() is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+# Popen objects of the thread backend still running. Ctrl-C reaches only the
+# main thread, so it kills these itself instead of waiting for the pool
+_live_processes = set()
+_live_lock = threading.Lock()
+_interrupted = threading.Event()
+
+def track_process(process: subprocess.Popen):
+    """Register a started process; after Ctrl-C it is killed right away"""
+    with _live_lock:
+        _live_processes.add(process)
+    if _interrupted.is_set():
+        kill_process_group(process)
+
+def untrack_process(process: subprocess.Popen):
+    with _live_lock:
+        _live_processes.discard(process)
+
+def interrupted() -> bool:
+    """True once Ctrl-C was handled by interrupt_guard (workers stop taking jobs)"""
+    return _interrupted.is_set()
+
+def kill_tracked_processes():
+    _interrupted.set()
+    with _live_lock:
+        processes = list(_live_processes)
+    for process in processes:
+        kill_process_group(process)
+
+@contextlib.contextmanager
+def interrupt_guard(pool=None):
+    """
+    Wrap the body of a ThreadPoolExecutor block: on Ctrl-C cancel the queued
+    jobs and kill the running process groups BEFORE the pool joins its workers
+    """
+    try:
+        yield
+    except KeyboardInterrupt:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        kill_tracked_processes()
+        print("\n[INFO] Interrupted - running processes were terminated")
+        raise
+
+async def _terminate(process: asyncio.subprocess.Process, grace: float = KILL_GRACE):
+    if process.returncode is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), grace)
+        except asyncio.TimeoutError:
+            os.killpg(process.pid, signal.SIGKILL)
+            await process.wait()
+    except ProcessLookupError:
+        pass
+
+async def stream_process(cmd: List[str], timeout: float,
+                         on_line: Callable[[str], bool]) -> Tuple[Optional[int], bool]:
+    """
+    Run cmd (stderr merged into stdout), calling on_line for every line.
+    on_line returning True stops the process early.
+    Returns (returncode, timed_out); returncode is None when we killed it.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True  # own process group -> killpg reaches children too
+    )
+
+    async def _pump() -> bool:
+        while True:
+            raw = await process.stdout.readline()
+            if not raw:
+                return False
+            if on_line(raw.decode('utf-8', errors='replace')):
+                return True
+
+    timed_out = False
+    stopped = False
+    try:
+        stopped = await asyncio.wait_for(_pump(), timeout)
+        if not stopped:
+            return await process.wait(), False
+    except asyncio.TimeoutError:
+        timed_out = True
+    finally:
+        # Runs on timeout, early stop AND cancellation (Ctrl-C)
+        await asyncio.shield(_terminate(process))
+    return None, timed_out
+
+async def run_process(cmd: List[str], timeout: float,
+                      input_data: Optional[str] = None) -> Tuple[Optional[int], str, str, bool]:
+    """
+    Run cmd to completion: (returncode, stdout, stderr, timed_out)
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE if input_data is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            process.communicate(input_data.encode() if input_data is not None else None), timeout)
+        return process.returncode, stdout.decode('utf-8', errors='replace'), \
+            stderr.decode('utf-8', errors='replace'), False
+    except asyncio.TimeoutError:
+        return None, '', '', True
+    finally:
+        await asyncio.shield(_terminate(process))
+
+def run_async(coro):
+    """
+    asyncio.run with a clean Ctrl-C: the main task is cancelled, every
+    stream_process/run_process finally-block kills its process group,
+    then KeyboardInterrupt propagates
+    """
+    try:
+        return asyncio.run(coro)
+    except KeyboardInterrupt:
+        print("\n[INFO] Interrupted - running processes were terminated")
+        raise
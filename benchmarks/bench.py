@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark Suite
+Times every stage on a generated corpus (benchmarks/gen_contracts.py):
+instrument.py, ReentrancyInjector, verify-contracts.py (per file and
+batched) and the echidna runner. Each stage runs in a fresh interpreter, so
+its peak RSS is its own. solc/echidna/crytic-compile are the stubs in
+benchmarks/stubs, which answer instantly so the numbers measure the Python
+overhead alone; --real-tools uses the installed tools instead. Results are
+JSON keyed by commit; --compare diffs two runs.
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+import tracemalloc
+import argparse
+import contextlib
+from typing import List, Dict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+STUBS_DIR = os.path.join(BENCH_DIR, "stubs")
+sys.path.insert(0, ROOT)
+
+from gen_contracts import generate_corpus, add_size_arguments, sizes_from_args
+
+# Stage -> (directory it reads, directory it writes, item unit); order = pipeline order
+STAGES = {
+    'generate':     (None, 'contracts', 'files'),
+    'instrument':   ('contracts', 'ready', 'files'),
+    'inject':       ('ready', 'injected', 'variants'),
+    'verify':       ('injected', None, 'files'),
+    'verify-batch': ('injected', None, 'files'),
+    'run':          ('injected', 'echidna-results', 'contracts'),
+}
+
+# Throughput drop (fraction) that --compare reports as a regression
+DEFAULT_TOLERANCE = 0.10
+
+def _sol_files(directory: str) -> List[str]:
+    return sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".sol"))
+
+# ------------------------------------------------------------------ stages
+# Each returns the number of items processed; console output is discarded
+
+def stage_generate(work_dir: str, args) -> int:
+    return len(generate_corpus(os.path.join(work_dir, 'contracts'), args.count, args.seed,
+                               **sizes_from_args(args)))
+
+def stage_instrument(work_dir: str, args) -> int:
+    import instrument
+    output_dir = os.path.join(work_dir, 'ready')
+    results = [instrument.instrument_file(path, output_dir)
+               for path in _sol_files(os.path.join(work_dir, 'contracts'))]
+    return sum(1 for r in results if r['status'] == 'instrumented')
+
+def stage_inject(work_dir: str, args) -> int:
+    from pipeline import bug_injector
+    output_dir = os.path.join(work_dir, 'injected')
+    variants = 0
+    for path in _sol_files(os.path.join(work_dir, 'ready')):
+        injector = bug_injector.ReentrancyInjector(path, output_dir)
+        if args.packed:
+            injector.inject_packed(args.packed)
+        else:
+            injector.inject_all()
+        variants += len(injector.injection_log)
+    return variants
+
+def stage_verify(work_dir: str, args) -> int:
+    from pipeline import verify_contracts
+    paths = _sol_files(os.path.join(work_dir, 'injected'))
+    for path in paths:
+        verify_contracts.verify_contract(path)
+    return len(paths)
+
+def stage_verify_batch(work_dir: str, args) -> int:
+    from pipeline import verify_contracts
+    paths = _sol_files(os.path.join(work_dir, 'injected'))
+    for i in range(0, len(paths), args.batch_size):
+        verify_contracts.verify_batch(paths[i:i + args.batch_size])
+    return len(paths)
+
+def stage_run(work_dir: str, args) -> int:
+    from run import EchidnaRunner
+    runner = EchidnaRunner(os.path.join(work_dir, 'injected'), os.path.join(work_dir, 'echidna-results'),
+                           timeout=args.timeout, workers=args.workers, test_limit=args.test_limit)
+    return len(runner.run_all(parallel=args.workers > 1, backend=args.backend))
+
+STAGE_FUNCTIONS = {
+    'generate': stage_generate,
+    'instrument': stage_instrument,
+    'inject': stage_inject,
+    'verify': stage_verify,
+    'verify-batch': stage_verify_batch,
+    'run': stage_run,
+}
+
+def measure_stage(stage: str, work_dir: str, args) -> Dict:
+    """In the child interpreter: run one stage once and measure it"""
+    # Fresh output dir: every repeat does the full work
+    output = STAGES[stage][1]
+    if output:
+        shutil.rmtree(os.path.join(work_dir, output), ignore_errors=True)
+
+    # Imports are not part of any stage: every stage starts with all modules loaded
+    import instrument, pipeline  # noqa: F401
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if args.tracemalloc:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        items = STAGE_FUNCTIONS[stage](work_dir, args)
+    seconds = time.perf_counter() - start
+    result = {
+        'items': items,
+        'seconds': seconds,
+        # ru_maxrss is in KiB on Linux (bytes on macOS)
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'base_rss_kb': base_rss,
+        'tools_peak_rss_kb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+    if args.tracemalloc:
+        result['tracemalloc_peak_kb'] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    return result
+
+# ------------------------------------------------------------------ driver
+
+def with_prerequisites(stages: List[str]) -> List[str]:
+    """Selected stages plus the ones producing their inputs, in pipeline order"""
+    needed = set(stages)
+    for stage in reversed(list(STAGES)):
+        if stage in needed and STAGES[stage][0]:
+            needed.update(s for s, (_, out, _) in STAGES.items() if out == STAGES[stage][0])
+    return [s for s in STAGES if s in needed]
+
+def child_command(stage: str, work_dir: str, result_path: str, argv: List[str]) -> List[str]:
+    return [sys.executable, os.path.abspath(__file__), *argv,
+            '--child', stage, '--work-dir', work_dir, '--child-result', result_path]
+
+def tool_env(real_tools: bool) -> Dict[str, str]:
+    env = dict(os.environ)
+    if not real_tools:
+        env['PATH'] = STUBS_DIR + os.pathsep + env.get('PATH', '')
+    return env
+
+def run_stage(stage: str, work_dir: str, argv: List[str], repeat: int, env: Dict[str, str]) -> Dict:
+    """Run a stage `repeat` times in fresh interpreters; median time, max memory"""
+    samples = []
+    for _ in range(repeat):
+        result_path = os.path.join(work_dir, f".bench-{stage}.json")
+        proc = subprocess.run(child_command(stage, work_dir, result_path, argv), env=env, cwd=work_dir,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"stage '{stage}' failed:\n{proc.stderr.strip()}")
+        with open(result_path, 'r') as f:
+            samples.append(json.load(f))
+
+    seconds = statistics.median(s['seconds'] for s in samples)
+    items = samples[-1]['items']
+    result = {
+        'unit': STAGES[stage][2],
+        'items': items,
+        'seconds': seconds,
+        'seconds_min': min(s['seconds'] for s in samples),
+        'items_per_s': items / seconds if seconds else None,
+        'peak_rss_kb': max(s['peak_rss_kb'] for s in samples),
+        'base_rss_kb': min(s['base_rss_kb'] for s in samples),
+        'tools_peak_rss_kb': max(s['tools_peak_rss_kb'] for s in samples),
+    }
+    if 'tracemalloc_peak_kb' in samples[0]:
+        result['tracemalloc_peak_kb'] = max(s['tracemalloc_peak_kb'] for s in samples)
+    return result
+
+def git_info() -> Dict:
+    def git(*cmd):
+        try:
+            proc = subprocess.run(['git', '-C', ROOT, *cmd], capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return proc.stdout.strip() if proc.returncode == 0 else None
+
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(status) if status is not None else None}
+
+def print_table(stages: Dict[str, Dict]):
+    print(f"{'Stage':<14} {'Items':>8} {'Seconds':>9} {'Items/s':>10} {'Peak RSS':>10} {'Tools RSS':>10}")
+    for name, s in stages.items():
+        rate = f"{s['items_per_s']:.1f}" if s['items_per_s'] else "-"
+        print(f"{name:<14} {s['items']:>8} {s['seconds']:>9.3f} {rate:>10} "
+              f"{s['peak_rss_kb'] / 1024:>8.1f}MB {s['tools_peak_rss_kb'] / 1024:>8.1f}MB")
+
+# ------------------------------------------------------------------ compare
+
+def compare(baseline: Dict, current: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Print per-stage throughput/memory changes; returns the regressed stages"""
+    print(f"[Compare] {(baseline.get('commit') or '?')[:10]} -> {(current.get('commit') or '?')[:10]}")
+    if baseline.get('params') != current.get('params'):
+        print("[WARN] Benchmark parameters differ; the numbers are not directly comparable")
+
+    regressed = []
+    for name, cur in current['stages'].items():
+        base = baseline['stages'].get(name)
+        if not base or not base.get('items_per_s') or not cur.get('items_per_s'):
+            continue
+        change = cur['items_per_s'] / base['items_per_s'] - 1
+        rss = (cur['peak_rss_kb'] - base['peak_rss_kb']) / 1024
+        flag = ""
+        if change < -tolerance:
+            flag = "  [REGRESSION]"
+            regressed.append(name)
+        print(f"  {name:<14} {base['items_per_s']:>10.1f} -> {cur['items_per_s']:>10.1f} items/s "
+              f"({change:+.1%}), peak RSS {rss:+.1f}MB{flag}")
+    return regressed
+
+def load_result(path: str) -> Dict:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on generated contracts")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES),
+                        help="Stages to measure (their prerequisites run too)")
+    parser.add_argument("-n", "--count", type=int, default=50, help="Generated source files")
+    add_size_arguments(parser)
+    parser.add_argument("--packed", choices=["mapping", "all"], default=None,
+                        help="Inject packed variants (bug-injector.py --packed)")
+    parser.add_argument("--batch-size", type=int, default=50, help="Files per solc call in verify-batch")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="Runner workers in the run stage")
+    parser.add_argument("--backend", choices=["threads", "asyncio"], default="threads",
+                        help="Runner backend in the run stage (with -j > 1)")
+    parser.add_argument("--timeout", type=int, default=120, help="Per-contract timeout in the run stage")
+    parser.add_argument("--test-limit", type=int, default=50000, help="Echidna --test-limit in the run stage")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage (median time is reported)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Also record the Python heap peak (slows the stages down)")
+    parser.add_argument("--real-tools", action="store_true",
+                        help="Use solc/echidna from PATH instead of the stubs")
+    parser.add_argument("--work-dir", default=None, help="Keep the generated corpus and outputs here")
+    parser.add_argument("-o", "--output", default=None, help="Write the results JSON here")
+    parser.add_argument("--compare", nargs="+", default=None, metavar="RESULT_JSON",
+                        help="Compare against a baseline result (or compare two result files and exit)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Throughput drop reported as a regression by --compare")
+    # Internal: one measurement in a fresh interpreter
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--child-result", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = measure_stage(args.child, args.work_dir, args)
+        with open(args.child_result, 'w') as f:
+            json.dump(result, f)
+        return
+
+    if args.compare and len(args.compare) == 2:
+        regressed = compare(load_result(args.compare[0]), load_result(args.compare[1]), args.tolerance)
+        sys.exit(1 if regressed else 0)
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline, or two result files")
+
+    work_dir = os.path.abspath(args.work_dir) if args.work_dir else tempfile.mkdtemp(prefix="bench-")
+    os.makedirs(work_dir, exist_ok=True)
+    # Children re-parse the same flags; --child makes them measure instead
+    argv = sys.argv[1:]
+    env = tool_env(args.real_tools)
+
+    stages = with_prerequisites(args.stages)
+    print(f"[INFO] Stages: {', '.join(stages)} ({args.repeat}x, "
+          f"{'real tools' if args.real_tools else 'stub tools'}) in {work_dir}")
+    results = {}
+    try:
+        for stage in stages:
+            results[stage] = run_stage(stage, work_dir, argv, args.repeat, env)
+            print(f"  ✓ {stage}: {results[stage]['items']} {results[stage]['unit']} "
+                  f"in {results[stage]['seconds']:.3f}s")
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        **git_info(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'tools': 'real' if args.real_tools else 'stub',
+        'params': {
+            'count': args.count, **sizes_from_args(args), 'seed': args.seed, 'packed': args.packed,
+            'batch_size': args.batch_size, 'workers': args.workers, 'backend': args.backend,
+            'test_limit': args.test_limit, 'repeat': args.repeat,
+        },
+        'stages': results,
+    }
+
+    print()
+    print_table(results)
+    if args.output:
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[INFO] Results: {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        print()
+        regressed = compare(load_result(args.compare[0]), report, args.tolerance)
+        sys.exit(1 if regressed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Synthetic Contract Generator
+Seeded Solidity contracts of configurable size for the benchmarks: balance
+mappings, uint state vars, functions, balance-mutation sites
+(`m[msg.sender] += / -=`) and helper contracts per file. The same seed and
+sizes always give the same files, so timings are comparable across commits.
+"""
+
+import os
+import random
+import argparse
+from typing import List, Dict
+
+# Default size of one generated contract (SimpleBank is about 1/1/2/2/1)
+DEFAULT_SIZES = {
+    'mappings': 2,
+    'uints': 3,
+    'functions': 6,
+    'mutations': 8,
+    'contracts_per_file': 2,
+}
+
+def _helper_contract(name: str, rng: random.Random) -> str:
+    """Filler contract without balance mappings (the tools must skip it)"""
+    fields = rng.randint(1, 3)
+    lines = [f"contract {name} {{\n"]
+    for k in range(fields):
+        lines.append(f"    uint256 internal value{k};\n")
+    lines.append("\n")
+    for k in range(fields):
+        lines.append(f"    function setValue{k}(uint256 _v) internal {{\n"
+                     f"        value{k} = _v;\n"
+                     f"    }}\n\n")
+    lines.append("}\n\n")
+    return "".join(lines)
+
+def generate_contract(name: str, rng: random.Random, mappings: int = 2, uints: int = 3,
+                      functions: int = 6, mutations: int = 8, contracts_per_file: int = 2) -> str:
+    """
+    One .sol file: contracts_per_file - 1 helpers, then the main contract
+    (last). Mutation sites are spread round-robin over the functions; even
+    functions are payable deposits (+= msg.value), odd ones withdrawals
+    (-= _amount, then the transfer).
+    """
+    mappings, functions = max(1, mappings), max(1, functions)
+    maps = [f"balances{k}" for k in range(mappings)]
+    counters = [f"counter{k}" for k in range(uints)]
+
+    sites: List[List[str]] = [[] for _ in range(functions)]
+    for k in range(mutations):
+        sites[k % functions].append(rng.choice(maps))
+
+    out = ["// SPDX-License-Identifier: MIT\n", "pragma solidity ^0.8.0;\n\n"]
+    for k in range(max(0, contracts_per_file - 1)):
+        out.append(_helper_contract(f"{name}Helper{k}", rng))
+
+    out.append(f"contract {name} {{\n")
+    for var in maps:
+        out.append(f"    mapping(address => uint256) public {var};\n")
+    for var in counters:
+        out.append(f"    uint256 public {var};\n")
+    out.append("\n")
+
+    for i in range(functions):
+        deposit = i % 2 == 0
+        if deposit:
+            out.append(f"    function deposit{i}() public payable {{\n")
+        else:
+            out.append(f"    function withdraw{i}(uint256 _amount) public {{\n")
+        for var in sites[i]:
+            if deposit:
+                out.append(f"        {var}[msg.sender] += msg.value;\n")
+            else:
+                out.append(f"        require({var}[msg.sender] >= _amount, \"Insufficient funds\");\n"
+                           f"        {var}[msg.sender] -= _amount;\n")
+        if counters and rng.random() < 0.5:
+            out.append(f"        {rng.choice(counters)} += 1;\n")
+        if not deposit and sites[i]:
+            out.append("        payable(msg.sender).transfer(_amount);\n")
+        out.append("    }\n\n")
+
+    out.append("}\n")
+    return "".join(out)
+
+def generate_corpus(output_dir: str, count: int, seed: int = 0, prefix: str = "Bench",
+                    **sizes) -> List[str]:
+    """count files <prefix><i>.sol in output_dir; returns their paths"""
+    params: Dict[str, int] = dict(DEFAULT_SIZES, **sizes)
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for i in range(count):
+        # Own RNG per file: file i is the same whatever the count
+        rng = random.Random(seed * 1_000_003 + i)
+        name = f"{prefix}{i}"
+        path = os.path.join(output_dir, name + ".sol")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generate_contract(name, rng, **params))
+        paths.append(path)
+    return paths
+
+def add_size_arguments(parser):
+    """Size flags shared with bench.py"""
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed")
+    parser.add_argument("--mappings", type=int, default=DEFAULT_SIZES['mappings'],
+                        help="Balance mappings per contract")
+    parser.add_argument("--uints", type=int, default=DEFAULT_SIZES['uints'],
+                        help="uint256 state vars per contract")
+    parser.add_argument("--functions", type=int, default=DEFAULT_SIZES['functions'],
+                        help="Functions per contract")
+    parser.add_argument("--mutations", type=int, default=DEFAULT_SIZES['mutations'],
+                        help="Balance-mutation sites per contract")
+    parser.add_argument("--contracts-per-file", type=int, default=DEFAULT_SIZES['contracts_per_file'],
+                        help="Contracts per file (helpers + the main contract)")
+
+def sizes_from_args(args) -> Dict[str, int]:
+    return {key: getattr(args, key) for key in DEFAULT_SIZES}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Solidity contracts for benchmarks")
+    parser.add_argument("output_dir", help="Directory for the generated .sol files")
+    parser.add_argument("-n", "--count", type=int, default=50, help="Number of files")
+    parser.add_argument("--prefix", default="Bench", help="Contract/file name prefix")
+    add_size_arguments(parser)
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.output_dir, args.count, args.seed, args.prefix, **sizes_from_args(args))
+    print(f"[INFO] Generated {len(paths)} contracts in {args.output_dir}/")
+
+if __name__ == "__main__":
+    main()
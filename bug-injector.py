@@ -5,41 +5,53 @@ Methodology: Systematic Injection into All Candidate State Variables
 """
 
 import os
-import re
 import json
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Iterator
+
+from sol_index import SolIndex
+from sol_patch import PatchSet, SourceBuffer
+from results_store import ResultsStore
+import profiling
+from profiling import span
 
 class ReentrancyInjector:
-    def __init__(self, contract_path: str, output_dir: str = "injected-contracts"):
+    def __init__(self, contract_path: str, output_dir: str = "injected-contracts",
+                 store: Optional[ResultsStore] = None):
         self.contract_path = contract_path
         self.output_dir = output_dir
         self.contract_name = os.path.basename(contract_path).replace('.sol', '')
         
-        with open(contract_path, 'r', encoding='utf-8') as f:
-            self.source_code = f.read()
+        with span('read', file=os.path.basename(contract_path), profile=True):
+            with open(contract_path, 'r', encoding='utf-8') as f:
+                self.source_code = f.read()
         
-        self.main_contract_name = self._detect_contract_name()
+        # Tokenize once; all detection/positions below come from the index
+        with span('index', file=os.path.basename(contract_path), profile=True):
+            self.index = SolIndex(self.source_code)
+            # Encoded once; every variant is streamed from it as offset patches
+            self.buffer = SourceBuffer(self.source_code)
+            self.main_contract = self.index.main_contract()
+            self.main_contract_name = self._detect_contract_name()
         
         # [SOLIDIFI UPDATE] Detect ALL candidates, not just the first one
-        self.balance_mappings = self._detect_all_balance_mappings()
-        self.total_deposit_vars = self._detect_all_uint_vars()
+        with span('detect mappings', file=os.path.basename(contract_path), profile=True):
+            self.balance_mappings = self._detect_all_balance_mappings()
+            self.total_deposit_vars = self._detect_all_uint_vars()
         
         self.injection_log = []
+        # Injections are also recorded in the SQLite store when given
+        self.store = store
     
     def _detect_contract_name(self) -> str:
-        match = re.search(r'contract\s+(\w+)', self.source_code)
-        return match.group(1) if match else self.contract_name
+        return self.main_contract['name'] if self.main_contract else self.contract_name
     
     def _detect_all_balance_mappings(self) -> List[str]:
         """Find ALL mappings that look like balances"""
         mappings = []
-        # Pattern: mapping(address => uint...) name;
-        pattern = r'mapping\s*\(\s*address\s*=>\s*u?int\d*\s*\)\s*(?:public|private|internal)?\s+(\w+)'
-        matches = re.finditer(pattern, self.source_code)
-        for match in matches:
-            name = match.group(1)
+        # Pattern: mapping(address => uint...) name; -- declared in the target contract
+        for var in self.index.balance_mappings(self.main_contract_name):
             # Filter out non-balance looking names if needed, or keep all for "Exhaustive" approach
-            mappings.append(name)
+            mappings.append(var['name'])
         
         if not mappings:
             print("[WARN] No mappings found. Using default 'balances'.")
@@ -51,15 +63,12 @@ class ReentrancyInjector:
     def _detect_all_uint_vars(self) -> List[str]:
         """Find ALL uint variables (candidates for total supply/deposits)"""
         uints = []
-        # Pattern: uint256 name;
-        pattern = r'uint(?:256)?\s+(?:public|private|internal)?\s+(\w+)\s*;'
-        matches = re.finditer(pattern, self.source_code)
-        
+        # Pattern: uint256 name; (state vars only, no constants/initializers)
         # Helper to blacklist constants or irrelevant vars
         blacklist = ['deadline', 'start', 'end', 'period', 'version']
         
-        for match in matches:
-            name = match.group(1)
+        for var in self.index.uint_vars(self.main_contract_name):
+            name = var['name']
             if not any(b in name.lower() for b in blacklist):
                 uints.append(name)
         
@@ -71,27 +80,43 @@ class ReentrancyInjector:
         print(f"[INFO] Detected {len(uints)} state variables: {uints}")
         return uints
 
-    def _get_bug_variants(self, target_mapping: str, target_total: str) -> List[Dict]:
+    def _get_bug_variants(self, target_mapping: str, target_total: str, packed: bool = False) -> List[Dict]:
         """Generate bug variants for a SPECIFIC mapping/total pair"""
         variants = []
         
         # NOTE: Using simplified variants without 'total -= amount' to trigger Oracle Failure (Accounting Bug)
         
+        # [PACKED] All variants share the same oracle, so one exploited variant would
+        # falsify every echidna_detect_* in the contract. Ghost counters record each
+        # variant's untracked outflow and every property excuses the OTHER variants'
+        # leaks -> a property only fails for its own variant. Empty when not packed.
+        def ghost(key: str) -> str:
+            return f"    uint256 internal _inj_leak_{key};\n" if packed else ""
+        
+        def leak(key: str, amount: str) -> str:
+            return f" _inj_leak_{key} += {amount}; _inj_leak_total += {amount};" if packed else ""
+        
+        def excused(key: str) -> str:
+            return f" + _inj_leak_total - _inj_leak_{key}" if packed else ""
+        
+        classic, send, transfer, delegate = (f"{target_mapping}_{s}" for s in ('classic', 'send', 'transfer', 'delegate'))
+        
         # Variant 1: Classic
         variants.append({
             'name': 'classic_call',
+            'property': f'echidna_detect_{target_mapping}_classic',
             'code': f'''
     // [SolidiFI] Injected Bug: Classic Reentrancy on {{ {target_mapping} }}
-    function withdraw_vulnerable_{target_mapping}(uint256 _amount) public {{
+{ghost(classic)}    function withdraw_vulnerable_{target_mapping}(uint256 _amount) public {{
         require({target_mapping}[msg.sender] >= _amount, "Insufficient balance");
         (bool success, ) = msg.sender.call{{value: _amount}}("");
         require(success, "Transfer failed");
-        {target_mapping}[msg.sender] -= _amount;
+        {target_mapping}[msg.sender] -= _amount;{leak(classic, '_amount')}
         // BUG: {target_total} NOT updated -> Oracle Violation
     }}
     
     function echidna_detect_{target_mapping}_classic() public view returns (bool) {{
-        return address(this).balance >= {target_total};
+        return address(this).balance{excused(classic)} >= {target_total};
     }}
 '''
         })
@@ -99,18 +124,19 @@ class ReentrancyInjector:
         # Variant 2: Send
         variants.append({
             'name': 'send',
+            'property': f'echidna_detect_{target_mapping}_send',
             'constructor': '    constructor() payable {} \n    receive() external payable {}',
             'code': f'''
     // [SolidiFI] Injected Bug: Send Reentrancy on {{ {target_mapping} }}
-    function withdraw_send_{target_mapping}(uint256 _amount) public {{
+{ghost(send)}    function withdraw_send_{target_mapping}(uint256 _amount) public {{
         require({target_mapping}[msg.sender] >= _amount, "Insufficient balance");
         bool success = payable(msg.sender).send(_amount);
         require(success, "Send failed");
-        {target_mapping}[msg.sender] -= _amount;
+        {target_mapping}[msg.sender] -= _amount;{leak(send, '_amount')}
     }}
     
     function echidna_detect_{target_mapping}_send() public view returns (bool) {{
-        return address(this).balance >= {target_total};
+        return address(this).balance{excused(send)} >= {target_total};
     }}
 '''
         })
@@ -118,18 +144,19 @@ class ReentrancyInjector:
         # Variant 3: Transfer
         variants.append({
             'name': 'transfer',
+            'property': f'echidna_detect_{target_mapping}_transfer',
             'constructor': '    constructor() payable {} \n    receive() external payable {}',
             'code': f'''
     // [SolidiFI] Injected Bug: Transfer Reentrancy on {{ {target_mapping} }}
-    function withdraw_transfer_{target_mapping}() public {{
+{ghost(transfer)}    function withdraw_transfer_{target_mapping}() public {{
         uint256 amount = {target_mapping}[msg.sender];
         require(amount > 0, "No balance");
         payable(msg.sender).transfer(amount);
-        {target_mapping}[msg.sender] = 0;
+        {target_mapping}[msg.sender] = 0;{leak(transfer, 'amount')}
     }}
     
     function echidna_detect_{target_mapping}_transfer() public view returns (bool) {{
-        return address(this).balance >= {target_total};
+        return address(this).balance{excused(transfer)} >= {target_total};
     }}
 '''
         })
@@ -137,104 +164,194 @@ class ReentrancyInjector:
         # Variant 4: DelegateCall
         variants.append({
             'name': 'delegatecall',
+            'property': f'echidna_detect_{target_mapping}_delegate',
             'constructor': '    constructor() payable {} \n    receive() external payable {}',
             'code': f'''
     // [SolidiFI] Injected Bug: DelegateCall on {{ {target_mapping} }}
-    address public externalContract_{target_mapping};
+{ghost(delegate)}    address public externalContract_{target_mapping};
     function setExternal_{target_mapping}(address _contract) public {{ externalContract_{target_mapping} = _contract; }}
     
     function withdraw_delegate_{target_mapping}(uint256 _amount) public {{
         require({target_mapping}[msg.sender] >= _amount);
         (bool success,) = msg.sender.call{{value: _amount}}("");
         require(success);
-        {target_mapping}[msg.sender] -= _amount;
+        {target_mapping}[msg.sender] -= _amount;{leak(delegate, '_amount')}
     }}
 
     function echidna_detect_{target_mapping}_delegate() public view returns (bool) {{
-        return address(this).balance >= {target_total};
+        return address(this).balance{excused(delegate)} >= {target_total};
     }}
 '''
         })
         
         return variants
     
-    def _find_contract_end_from_lines(self, lines: List[str]) -> int:
-        for i in range(len(lines) - 1, -1, -1):
-            if lines[i].strip().startswith('}'): return i
-        return len(lines) - 1
+    def _find_contract_end_line(self) -> int:
+        """Line holding the closing '}' of the target contract"""
+        if self.main_contract:
+            return self.index.line_of(self.main_contract['end'])
+        return self.source_code.count('\n')
 
-    def _find_or_create_constructor(self, lines: list) -> tuple:
-        for i, line in enumerate(lines):
-            if 'constructor' in line: return (True, i)
-        for i, line in enumerate(lines):
-            if 'contract ' in line: return (False, i + 1)
+    def _find_or_create_constructor(self) -> tuple:
+        """(has_constructor, line to insert one at) for the target contract"""
+        if self.index.constructors(self.main_contract_name):
+            return (True, self.index.line_of(self.index.constructors(self.main_contract_name)[0]['start']))
+        if self.main_contract:
+            return (False, self.index.line_of(self.main_contract['body_start']) + 1)
         return (False, 0)
     
-    def inject_all(self) -> List[str]:
+    def _render(self, variants: List[Dict], file_suffix: str, packed: bool = False) -> Tuple[str, PatchSet]:
+        """Patch set that inserts one or more variants; returns (file name, patches)"""
+        patches = PatchSet()
+        
+        constructor = next((v['constructor'] for v in variants if 'constructor' in v), None)
+        if constructor:
+            has_cons, pos = self._find_or_create_constructor()
+            if not has_cons: patches.insert(self._line_offset(pos), constructor + '\n')
+        
+        code = ''.join(v['code'] for v in variants)
+        if packed:
+            code = "\n    // [SolidiFI] Packed variants: total untracked outflow\n    uint256 internal _inj_leak_total;\n" + code
+        
+        inject_pos = self._find_contract_end_line()
+        patches.insert(self._line_offset(inject_pos), code + '\n')
+        
+        # Naming convention: Contract_MappingName_BugType
+        new_contract_name = f"{self.main_contract_name}_Inj_{file_suffix}"
+        if self.main_contract:
+            name_start = self.main_contract['name_start']
+            patches.replace(name_start, name_start + len(self.main_contract_name), new_contract_name)
+        
+        return f"{self.contract_name}_{file_suffix}.sol", patches
+    
+    def _line_offset(self, line: int) -> int:
+        if line >= self.index.line_count():
+            return len(self.source_code)
+        return self.index.line_start(line)
+    
+    def render(self, variants: List[Dict], file_suffix: str, packed: bool = False) -> Tuple[str, str]:
+        """Injected source as a string (for callers that don't write files)"""
+        fname, patches = self._render(variants, file_suffix, packed)
+        return fname, self.buffer.render(patches)
+    
+    def _target_uint(self) -> str:
+        # Smart Selection: Find the uint most likely associated with this mapping
+        # (Simplification: Just pick 'totalDeposits' if it exists, or the first one)
+        # Ideally SolidiFI uses Data Flow Analysis, we use Heuristic Matching
+        return 'totalDeposits' if 'totalDeposits' in self.total_deposit_vars else self.total_deposit_vars[0]
+    
+    def write_variant(self, fname: str, patches: PatchSet, entries: List[Dict]) -> str:
+        """Write one variant from iter_variants and log it; returns its path"""
+        fpath = os.path.join(self.output_dir, fname)
+        self.buffer.write(fpath, patches)
+        self.injection_log.extend(entries)
+        return fpath
+    
+    def iter_variants(self, packed: Optional[str] = None) -> Iterator[Tuple[str, PatchSet, List[Dict]]]:
+        """
+        Lazily yield (file name, patch set, log entries) for every variant.
+        packed=None -> one file per mapping x variant (inject_all)
+        packed='mapping' / 'all' -> see inject_packed
+        """
+        if packed is None:
+            # [SOLIDIFI CORE] Loop through ALL combinations of Mapping + Uint
+            # This creates the "Exhaustive" nature of SolidiFI
+            for mapping_var in self.balance_mappings:
+                
+                target_uint = self._target_uint()
+                
+                bug_variants = self._get_bug_variants(mapping_var, target_uint)
+                
+                for variant in bug_variants:
+                    fname, patches = self._render([variant], f"{mapping_var}_{variant['name']}")
+                    yield fname, patches, [{
+                        'file': fname, 'source': self.contract_name, 'target': mapping_var,
+                        'bug': variant['name'], 'property': variant['property']
+                    }]
+            return
+        
+        groups = []
+        if packed == 'all':
+            groups.append(('packed', [(m, v) for m in self.balance_mappings
+                                      for v in self._get_bug_variants(m, self._target_uint(), packed=True)]))
+        else:
+            for mapping_var in self.balance_mappings:
+                groups.append((f"{mapping_var}_packed",
+                               [(mapping_var, v) for v in self._get_bug_variants(mapping_var, self._target_uint(), packed=True)]))
+        
+        for file_suffix, members in groups:
+            fname, patches = self._render([v for _, v in members], file_suffix, packed=True)
+            yield fname, patches, [{
+                'file': fname, 'source': self.contract_name, 'target': mapping_var,
+                'bug': variant['name'], 'property': variant['property'], 'packed': True
+            } for mapping_var, variant in members]
+    
+    def _generate(self, packed: Optional[str]) -> List[str]:
         os.makedirs(self.output_dir, exist_ok=True)
         output_files = []
         
-        # [SOLIDIFI CORE] Loop through ALL combinations of Mapping + Uint
-        # This creates the "Exhaustive" nature of SolidiFI
-        for mapping_var in self.balance_mappings:
-            
-            # Smart Selection: Find the uint most likely associated with this mapping
-            # (Simplification: Just pick 'totalDeposits' if it exists, or the first one)
-            # Ideally SolidiFI uses Data Flow Analysis, we use Heuristic Matching
-            target_uint = 'totalDeposits' if 'totalDeposits' in self.total_deposit_vars else self.total_deposit_vars[0]
-            
-            bug_variants = self._get_bug_variants(mapping_var, target_uint)
-            
-            for i, variant in enumerate(bug_variants):
-                try:
-                    lines = self.source_code.split('\n')
-                    
-                    if 'constructor' in variant:
-                        has_cons, pos = self._find_or_create_constructor(lines)
-                        if not has_cons: lines.insert(pos, variant['constructor'])
-                    
-                    inject_pos = self._find_contract_end_from_lines(lines)
-                    lines.insert(inject_pos, variant['code'])
-                    
-                    injected_code = '\n'.join(lines)
-                    
-                    # Naming convention: Contract_MappingName_BugType
-                    file_suffix = f"{mapping_var}_{variant['name']}"
-                    new_contract_name = f"{self.main_contract_name}_Inj_{file_suffix}"
-                    injected_code = re.sub(
-                        r'contract\s+' + re.escape(self.main_contract_name) + r'\b',
-                        f'contract {new_contract_name}',
-                        injected_code, count=1
-                    )
-                    
-                    fname = f"{self.contract_name}_{file_suffix}.sol"
-                    fpath = os.path.join(self.output_dir, fname)
-                    
-                    with open(fpath, 'w', encoding='utf-8') as f:
-                        f.write(injected_code)
-                    
-                    output_files.append(fpath)
-                    self.injection_log.append({'file': fname, 'target': mapping_var, 'bug': variant['name']})
+        variants = self.iter_variants(packed)
+        while True:
+            try:
+                with span('inject', source=self.contract_name, profile=True):
+                    fname, patches, entries = next(variants)
+            except StopIteration:
+                break
+            except Exception as e:
+                print(f"[ERROR] Failed to render variant: {e}")
+                break
+            try:
+                with span('write', file=fname, profile=True):
+                    output_files.append(self.write_variant(fname, patches, entries))
+                if packed:
+                    print(f"  ✓ Generated: {fname} ({len(entries)} variants)")
+                else:
                     print(f"  ✓ Generated: {fname}")
-                    
-                except Exception as e:
-                    print(f"[ERROR] Failed {variant['name']}: {e}")
+            except Exception as e:
+                print(f"[ERROR] Failed {fname}: {e}")
         
-        self._save_log()
+        self.save_log()
         return output_files
     
-    def _save_log(self):
+    def inject_all(self) -> List[str]:
+        return self._generate(None)
+    
+    def inject_packed(self, scope: str = 'mapping') -> List[str]:
+        """
+        Packed mode: put several variants into ONE contract.
+        scope='mapping' -> one file per mapping (all its variants)
+        scope='all'     -> one file for every mapping x variant
+        Every variant keeps its own echidna_detect_* property, so detection is
+        attributed per variant through the 'property' field of the log.
+        """
+        return self._generate(scope)
+    
+    def save_log(self):
+        """Injection log of the variants written so far (JSON + results store)"""
         log_path = os.path.join(self.output_dir, f"{self.contract_name}_injection_log.json")
         with open(log_path, 'w') as f: json.dump(self.injection_log, f, indent=2)
+        if self.store is not None:
+            self.store.add_injections(self.injection_log, self.contract_name)
 
 def main():
-    import sys
-    if len(sys.argv) < 2:
-        print("Usage: python3 bug-injector.py <contract.sol> [output_dir]")
-        sys.exit(1)
+    import argparse
+    parser = argparse.ArgumentParser(description="SolidiFI-style reentrancy bug injector")
+    parser.add_argument("contract", help="Source contract (.sol)")
+    parser.add_argument("output_dir", nargs="?", default="injected-contracts")
+    parser.add_argument("--packed", choices=["mapping", "all"], default=None,
+                        help="Pack variants into one contract per mapping, or one for all mappings")
+    parser.add_argument("--db", default=None, help="Also record injections in this SQLite results store")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.from_args(args, "bug-injector.py")
     
-    injector = ReentrancyInjector(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "injected-contracts")
-    injector.inject_all()
+    store = ResultsStore(args.db) if args.db else None
+    with span('inject stage', cat='stage', source=os.path.basename(args.contract)):
+        injector = ReentrancyInjector(args.contract, args.output_dir, store)
+        if args.packed:
+            injector.inject_packed(args.packed)
+        else:
+            injector.inject_all()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
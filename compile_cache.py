@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Compile Cache
+Shared by verify-contracts.py and run.py so unchanged contracts are never recompiled
+"""
+
+import os
+import re
+import glob
+import json
+import shutil
+import hashlib
+import threading
+import subprocess
+from typing import List, Dict, Optional, Tuple
+
+DEFAULT_CACHE_DIR = ".compile-cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# solc argument sets used by the verify stage (part of the cache key)
+BIN_ARGS = ['--bin']
+STANDARD_JSON_ARGS = ['--standard-json', 'abi']
+
+# crytic-compile export handed to echidna instead of the .sol (compile once, fuzz many)
+CRYTIC_EXPORT_ARGS = ['crytic-compile', '--export-format', 'standard']
+ARTIFACT_SUBDIR = "artifacts"
+
+IMPORT_PATTERN = re.compile(r'import\s+(?:[^"\']*from\s+)?["\']([^"\']+)["\']')
+
+_solc_version = None
+
+def solc_version() -> str:
+    """`solc --version` output, queried once per process"""
+    global _solc_version
+    if _solc_version is None:
+        try:
+            proc = subprocess.run(['solc', '--version'], capture_output=True, text=True, timeout=30)
+            _solc_version = proc.stdout.strip().split('\n')[-1] or "unknown"
+        except Exception:
+            _solc_version = "unknown"
+    return _solc_version
+
+def source_digest(contract_path: str) -> str:
+    """
+    SHA-256 over a file plus its relative imports (recursively),
+    so editing a dependency invalidates every file that imports it
+    """
+    digest = hashlib.sha256()
+    seen = set()
+    stack = [os.path.abspath(contract_path)]
+
+    while stack:
+        path = stack.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest.update(content)
+
+        for imported in IMPORT_PATTERN.findall(content.decode('utf-8', errors='replace')):
+            if imported.startswith('.'):
+                dep = os.path.normpath(os.path.join(os.path.dirname(path), imported))
+                if os.path.exists(dep):
+                    stack.append(dep)
+
+    return digest.hexdigest()
+
+def _dir_usage(path: str) -> Optional[Tuple[float, int]]:
+    """(newest mtime, total size) of the files under path; None when it has none"""
+    newest, size = None, 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            newest = st.st_mtime if newest is None else max(newest, st.st_mtime)
+            size += st.st_size
+    return (newest, size) if newest is not None else None
+
+class CompileCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, contract_path: str, solc_args: List[str], digest: Optional[str] = None) -> str:
+        """digest: precomputed source_digest(contract_path), to hash the sources once"""
+        material = "\n".join([digest or source_digest(contract_path), solc_version(), json.dumps(solc_args)])
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, contract_path: str, solc_args: List[str]) -> Optional[Dict]:
+        """
+        Returns {'success', 'message', 'artifact'} or None on miss
+        """
+        entry = self._load(self.key(contract_path, solc_args))
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def _load(self, key: str) -> Optional[Dict]:
+        """Entry for key or None; does not touch the hit/miss counters"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            os.utime(path)  # LRU: mark as recently used
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def put(self, contract_path: str, solc_args: List[str], success: bool,
+            message: str, artifact=None):
+        path = self._entry_path(self.key(contract_path, solc_args))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write-then-rename so parallel writers never leave a half-written entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'file': os.path.basename(contract_path),
+                'success': success,
+                'message': message,
+                'artifact': artifact
+            }, f)
+        os.replace(tmp_path, path)
+
+    def artifact(self, contract_path: str, timeout: int = 300,
+                 solc_args: str = "") -> Tuple[Optional[str], str]:
+        """
+        (path of the crytic-compile standard export, message); compiled on a
+        miss, path None when compilation fails. Echidna loads a *_export.json
+        target without invoking solc. OSError if crytic-compile is missing.
+        solc_args are the echidna config's solcArgs, so the export holds the
+        same bytecode echidna would compile itself.
+        """
+        # '=' form: argparse would take a separate '--optimize' for an option
+        extra = [f'--solc-args={solc_args}'] if solc_args else []
+        key = self.key(contract_path, CRYTIC_EXPORT_ARGS + extra)
+        export_dir = os.path.join(self.cache_dir, ARTIFACT_SUBDIR, key)
+        exports = glob.glob(os.path.join(export_dir, "*_export.json"))
+        if exports:
+            os.utime(exports[0])  # LRU: mark as recently used
+            self.hits += 1
+            return exports[0], "cached"
+        self.misses += 1
+
+        # Export into a private dir, then rename into place: concurrent
+        # workers building the same source never see a partial export
+        tmp_dir = f"{export_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            proc = subprocess.run(
+                CRYTIC_EXPORT_ARGS[:1] + [contract_path] + CRYTIC_EXPORT_ARGS[1:] + extra
+                + ['--export-dir', tmp_dir],
+                capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return None, f"crytic-compile timed out after {timeout}s"
+        if proc.returncode != 0 or not glob.glob(os.path.join(tmp_dir, "*_export.json")):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            lines = (proc.stderr or proc.stdout).strip().split('\n')
+            return None, lines[0] if lines[0] else f"crytic-compile exited with {proc.returncode}"
+        try:
+            os.rename(tmp_dir, export_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)  # Another worker won the race
+        return glob.glob(os.path.join(export_dir, "*_export.json"))[0], "compiled"
+
+    def find_outcome(self, contract_path: str) -> Optional[Dict]:
+        """
+        Any cached verify-stage outcome for this source, whichever mode produced
+        it. One lookup: the sources are hashed once and count one hit or miss.
+        """
+        digest = source_digest(contract_path)
+        for args in (BIN_ARGS, STANDARD_JSON_ARGS):
+            entry = self._load(self.key(contract_path, args, digest))
+            if entry is not None:
+                self.hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    def evict(self) -> int:
+        """
+        Drop least-recently-used entries until the cache fits in max_bytes.
+        An artifact dir (export + sources) is one entry, removed as a whole.
+        Returns number of entries removed.
+        """
+        artifacts_dir = os.path.join(self.cache_dir, ARTIFACT_SUBDIR)
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self.cache_dir):
+            if root == artifacts_dir:
+                for name in dirs:
+                    if name.endswith('.tmp'):
+                        continue  # Export still being written by a worker
+                    usage = _dir_usage(os.path.join(root, name))
+                    if usage is not None:
+                        entries.append((usage[0], usage[1], os.path.join(root, name)))
+                        total += usage[1]
+                dirs[:] = []
+                continue
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
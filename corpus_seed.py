@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Corpus Seeding
+Variants start with an empty echidna corpus because every one is renamed to
+a unique `_Inj_` contract. The original contract is fuzzed once; its corpus
+sequences that reach a balance-mutating function (deposit paths) are copied
+into each variant's corpus. Function names and the deployment address are
+unchanged by the renaming, so sequences apply as-is.
+"""
+
+import os
+import json
+import hashlib
+from typing import List, Dict, Set
+
+from sol_index import SolIndex
+
+# Echidna 2.x keeps corpus sequences as JSON lists of transactions here
+COVERAGE_SUBDIR = "coverage"
+
+# Per-variant cap on seeded sequences and on files in any corpus dir
+MAX_SEED_SEQUENCES = 200
+MAX_CORPUS_FILES = 2000
+
+def balance_functions(contract_path: str) -> Set[str]:
+    """Functions of the main contract that write a balance mapping"""
+    with open(contract_path, 'r', encoding='utf-8') as f:
+        index = SolIndex(f.read())
+    main = index.main_contract()
+    if main is None:
+        return set()
+    mappings = {v['name'] for v in index.balance_mappings(main['name'])}
+    return {m['function'] for m in index.mutations
+            if m['target'] in mappings and m['contract'] == main['name']}
+
+def _called(tx: Dict) -> str:
+    call = tx.get('call') or {}
+    if call.get('tag') == 'SolCall' and call.get('contents'):
+        return call['contents'][0]
+    return ''
+
+def load_sequences(corpus_dir: str, functions: Set[str]) -> List[List[Dict]]:
+    """Corpus sequences calling at least one of `functions`, shortest first"""
+    sequences = []
+    coverage_dir = os.path.join(corpus_dir, COVERAGE_SUBDIR)
+    if not os.path.isdir(coverage_dir):
+        return sequences
+    for name in sorted(os.listdir(coverage_dir)):
+        try:
+            with open(os.path.join(coverage_dir, name), 'r') as f:
+                sequence = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(sequence, list) and any(_called(tx) in functions for tx in sequence):
+            sequences.append(sequence)
+    sequences.sort(key=len)
+    return sequences
+
+def seed_corpus(corpus_dir: str, sequences: List[List[Dict]],
+                limit: int = MAX_SEED_SEQUENCES) -> int:
+    """
+    Write sequences into a corpus dir (content-addressed -> duplicates
+    collapse); returns how many new files were added
+    """
+    coverage_dir = os.path.join(corpus_dir, COVERAGE_SUBDIR)
+    os.makedirs(coverage_dir, exist_ok=True)
+    added = 0
+    for sequence in sequences[:limit]:
+        data = json.dumps(sequence, sort_keys=True)
+        path = os.path.join(coverage_dir, f"seed-{hashlib.sha256(data.encode()).hexdigest()[:32]}.txt")
+        if os.path.exists(path):
+            continue
+        with open(path, 'w') as f:
+            f.write(data)
+        added += 1
+    return added
+
+def cap_corpus(corpus_dir: str, max_files: int = MAX_CORPUS_FILES) -> int:
+    """Drop the oldest corpus files beyond max_files; returns number removed"""
+    coverage_dir = os.path.join(corpus_dir, COVERAGE_SUBDIR)
+    if not os.path.isdir(coverage_dir):
+        return 0
+    files = [os.path.join(coverage_dir, name) for name in os.listdir(coverage_dir)]
+    if len(files) <= max_files:
+        return 0
+    files.sort(key=os.path.getmtime)
+    for path in files[:len(files) - max_files]:
+        os.remove(path)
+    return len(files) - max_files
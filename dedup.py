@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Semantic Deduplication of Variants
+Normalizes a contract from its SolIndex token stream: comments dropped,
+revert/require messages dropped, write-only state variables and their
+setters removed, every declared identifier renamed canonically. Contracts
+with the same normalized hash are one equivalence class: only one
+representative is fuzzed and its verdict is copied to the others.
+"""
+
+import re
+import hashlib
+from typing import List, Dict, Tuple
+
+from sol_index import SolIndex
+
+# Names that keep their meaning across contracts (never renamed)
+RESERVED = set('''
+    abstract address anonymous as assembly bool break bytes calldata catch constant constructor
+    continue contract delete do else emit enum error event external fallback false for function
+    if immutable import indexed interface internal is library mapping memory modifier new
+    override payable pragma private public pure receive return returns revert storage string
+    struct throw true try type unchecked using view virtual while
+    msg block tx abi this super now gasleft blockhash require assert selfdestruct
+    keccak256 sha256 sha3 ripemd160 ecrecover addmod mulmod
+    wei gwei ether seconds minutes hours days weeks
+'''.split())
+ELEMENTARY_TYPE = re.compile(r'(u?int|bytes|u?fixed)\d*(x\d+)?$')
+MESSAGE_CALLS = ('require', 'revert')
+
+def _is_reserved(name: str) -> bool:
+    return name in RESERVED or bool(ELEMENTARY_TYPE.match(name))
+
+def _write_only_vars(index: SolIndex) -> List[Dict]:
+    """State variables that are assigned (`name = ...`) but never read"""
+    tokens = index.tokens
+    occurrences = {}
+    for i, tok in enumerate(tokens):
+        if tok[0] == 'ident':
+            occurrences.setdefault(tok[1], []).append(i)
+
+    found = []
+    for var in index.state_vars:
+        if var['constant']:
+            continue
+        used = False
+        for i in occurrences.get(var['name'], []):
+            if var['start'] <= tokens[i][2] < var['end']:
+                continue
+            if i > 0 and tokens[i - 1][1] == '.':
+                continue  # Member of something else
+            if i + 1 < len(tokens) and tokens[i + 1][1] == '=':
+                continue  # Plain write
+            used = True
+            break
+        if not used:
+            found.append(var)
+    return found
+
+def _setters(index: SolIndex, names: set) -> List[Dict]:
+    """Functions whose whole body is `x = ...;` statements on the given vars"""
+    setters = []
+    for func in index.functions:
+        if func['kind'] != 'function' or func['body_start'] is None:
+            continue
+        body = [t for t in index.tokens if func['body_start'] < t[2] < func['end']]
+        if not body:
+            continue
+        i, ok = 0, True
+        while i < len(body):
+            if body[i][1] not in names or i + 1 >= len(body) or body[i + 1][1] != '=':
+                ok = False
+                break
+            while i < len(body) and body[i][1] != ';':
+                i += 1
+            i += 1
+        if ok:
+            setters.append(func)
+    return setters
+
+def normalize(text: str) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Normalized token stream + canonical name -> original name
+    (same positions in two equivalent contracts map to each other)
+    """
+    index = SolIndex(text)
+    dead = _write_only_vars(index)
+    dead_names = {v['name'] for v in dead}
+    removed = [(v['start'], v['end']) for v in dead] + \
+              [(f['start'], f['end'] + 1) for f in _setters(index, dead_names)]
+
+    tokens = [t for t in index.tokens if not any(s <= t[2] < e for s, e in removed)]
+    canonical = {}
+    stream = []
+    call_stack = []  # Enclosing call names, to spot require/revert messages
+    for i, (kind, tok, _, _) in enumerate(tokens):
+        prev = tokens[i - 1][1] if i > 0 else ''
+        nxt = tokens[i + 1][1] if i + 1 < len(tokens) else ''
+
+        if tok == '(':
+            call_stack.append(prev)
+        elif tok == ')' and call_stack:
+            call_stack.pop()
+
+        if kind == 'string' and call_stack and call_stack[-1] in MESSAGE_CALLS and nxt == ')':
+            if stream and stream[-1] == ',':
+                stream.pop()  # require(cond, "msg") -> require(cond)
+            continue
+        if kind == 'ident' and prev != '.' and not _is_reserved(tok):
+            if tok not in canonical:
+                prefix = 'echidna_' if tok.startswith('echidna_') else ''
+                canonical[tok] = f"{prefix}${len(canonical)}"
+            tok = canonical[tok]
+        stream.append(tok)
+
+    return stream, {c: name for name, c in canonical.items()}
+
+def normalized_hash(text: str) -> str:
+    stream, _ = normalize(text)
+    return hashlib.sha256('\x00'.join(stream).encode()).hexdigest()
+
+def translate(names: List[str], source_names: Dict[str, str], target_names: Dict[str, str]) -> List[str]:
+    """Map identifiers of one class member (e.g. falsified properties) onto another"""
+    to_canonical = {name: c for c, name in source_names.items()}
+    return [target_names.get(to_canonical.get(name), name) for name in names]
+
+def equivalence_classes(paths: List[str]) -> Dict[str, List[str]]:
+    """representative path -> [all member paths] (first path of a class represents it)"""
+    classes = {}
+    reps = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            key = normalized_hash(f.read())
+        rep = reps.setdefault(key, path)
+        classes.setdefault(rep, []).append(path)
+    return classes
+
+def main():
+    import sys
+    import glob
+    import os
+
+    if len(sys.argv) < 2:
+        print("Usage: python dedup.py <contracts_dir>")
+        sys.exit(1)
+
+    paths = sorted(glob.glob(os.path.join(sys.argv[1], "*.sol")))
+    classes = equivalence_classes(paths)
+    print(f"[INFO] {len(paths)} contracts -> {len(classes)} equivalence classes")
+    for rep, members in classes.items():
+        if len(members) > 1:
+            print(f"  {os.path.basename(rep)}: " + ", ".join(os.path.basename(m) for m in members[1:]))
+
+if __name__ == "__main__":
+    main()
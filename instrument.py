@@ -1,181 +1,324 @@
 import os
-import re
+import io
+import sys
 import glob
+import json
+import hashlib
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+from sol_index import SolIndex
+from sol_patch import PatchSet, SourceBuffer
+import profiling
+from profiling import span
 
 # KONFIGURASI
 INPUT_DIR = "contracts"
 OUTPUT_DIR = "ready-contracts"
 
+# Naikkan jika logika instrumentasi berubah -> output lama dianggap basi
+INSTRUMENT_VERSION = "2"
+MANIFEST_FILE = ".instrument-manifest.json"
+
 # FUNGSI YANG DIABAIKAN
 IGNORE_FUNCTIONS = ["mint", "burn", "_mint", "_burn", "transfer", "_transfer", "transferFrom"]
 
 class Instrument:
-    def __init__(self, file_path):
+    def __init__(self, file_path, output_dir=OUTPUT_DIR):
         self.file_path = file_path
+        self.output_dir = output_dir
         self.filename = os.path.basename(file_path)
         self.lines = []
         self.map_name = None
+        self.index = None
+        # Pending edits as offsets into the ORIGINAL source, applied once in save()
+        self.patches = PatchSet()
+        self.manual_fixes = 0
 
     def run(self):
+        """Returns 'instrumented', 'mapping_not_found' or 'error'"""
         print(f"[*] Processing: {self.filename}")
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                self.lines = f.readlines()
+            with span('read', file=self.filename, profile=True):
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    self.lines = f.readlines()
         except Exception as e:
             print(f"    [!] Error reading file: {e}")
-            return
+            return 'error'
+
+        # Tokenize once; every inject_* step below queries this index
+        with span('index', file=self.filename, profile=True):
+            self.index = SolIndex("".join(self.lines))
 
-        if not self.detect_mapping():
+        with span('detect mappings', file=self.filename, profile=True):
+            found = self.detect_mapping()
+        if not found:
             print("    [-] Mapping not found.")
-            return
+            return 'mapping_not_found'
 
-        self.inject_state_var()
-        self.inject_logic()
-        self.inject_oracle()
-        self.save()
+        with span('inject', file=self.filename, profile=True):
+            self.inject_state_var()
+            self.inject_logic()
+            self.inject_oracle()
+        with span('write', file=self.filename, profile=True):
+            self.save()
+        return 'instrumented'
 
     def detect_mapping(self):
-        content = "".join(self.lines)
-        # Regex mencari mapping saldo
-        pattern = r"mapping\s*\(\s*address\s*=>\s*u?int\d*\s*\)\s*(?:public|private|internal)?\s+(\w+)\s*;"
-        match = re.search(pattern, content)
-        if match:
-            self.map_name = match.group(1)
+        # Mapping saldo: mapping(address => uint...) name;
+        mappings = self.index.balance_mappings()
+        if mappings:
+            self.mapping = mappings[0]
+            self.map_name = self.mapping['name']
             print(f"    [INFO] Mapping detected: '{self.map_name}'")
             return True
         return False
 
     def inject_state_var(self):
-        content = "".join(self.lines)
-        
-        # [ANTI-DUPLIKASI 1] Cek Variable dengan Regex (Tahan spasi/format)
-        # Cocok dengan: "uint256 public totalDeposits", "uint totalDeposits", dll.
-        if re.search(r"uint(256)?\s+(public\s+)?totalDeposits", content):
+        # [ANTI-DUPLIKASI 1] Cek Variable lewat index (tahan spasi/format)
+        if self.index.has_state_var("totalDeposits"):
             print("    [SKIP] 'totalDeposits' variable already exists.")
             return
 
-        # Injeksi jika belum ada
-        for i, line in enumerate(self.lines):
-            if "mapping" in line and self.map_name in line and ";" in line:
-                self.lines.insert(i + 1, "    uint256 public totalDeposits; // [AUTO-INSTRUMENTED]\n")
-                break
+        # Injeksi tepat setelah deklarasi mapping
+        line = self.index.line_of(self.mapping['end'])
+        self._insert_before_line(line + 1, "    uint256 public totalDeposits; // [AUTO-INSTRUMENTED]\n")
+
+    def _is_ignored(self, function_name, cache):
+        if function_name not in cache:
+            name = function_name.lower()
+            cache[function_name] = any(blacklisted in name for blacklisted in IGNORE_FUNCTIONS)
+        return cache[function_name]
+
+    def _mentions_total(self, line, need_assign):
+        # [ANTI-DUPLIKASI 2] Cek 3 baris ke depan
+        for k in range(1, 4):
+            if line + k < len(self.lines):
+                next_line = self.lines[line + k]
+                # Jika ada kata 'totalDeposits' dan ada tanda operasi (=, +=, -=)
+                if "totalDeposits" in next_line and (not need_assign or "=" in next_line):
+                    return line + k
+        return None
 
     def inject_logic(self):
-        new_lines = []
-        func_pattern = r"function\s+(\w+)\s*\("
-        
-        # Regex menangkap operasi saldo: balances[...] += val;
-        balance_op_pattern = re.escape(self.map_name) + r"\[(.*?)\]\s*(\+=|-=)\s*([^;]+);"
-        balance_reset_pattern = re.escape(self.map_name) + r"\[(.*?)\]\s*=\s*0;"
-
-        i = 0
-        current_function = ""
-        
-        while i < len(self.lines):
-            line = self.lines[i]
-            
-            # Deteksi Nama Fungsi (untuk blacklist)
-            func_match = re.search(func_pattern, line)
-            if func_match:
-                current_function = func_match.group(1)
-
-            new_lines.append(line)
-
-            # Cek Blacklist
-            is_ignored = False
-            if current_function:
-                for blacklisted in IGNORE_FUNCTIONS:
-                    if blacklisted in current_function.lower():
-                        is_ignored = True
-                        break
-            
-            if is_ignored:
-                i += 1
+        ignored_cache = {}
+        handled_lines = set()
+
+        # Operasi saldo dari index: balances[...] += val; / -= val; / = 0;
+        for site in self.index.mutations_of(self.map_name):
+            # Cek Blacklist (sekali per fungsi)
+            if self._is_ignored(site['function'], ignored_cache):
                 continue
 
-            op_match = re.search(balance_op_pattern, line)
-            reset_match = re.search(balance_reset_pattern, line)
-            indent = line[:len(line) - len(line.lstrip())]
+            line = self.index.line_of(site['end'] - 1)
+            if line in handled_lines:
+                continue  # Satu operasi per baris, seperti sebelumnya
+            first_line = self.lines[self.index.line_of(site['start'])]
+            indent = first_line[:len(first_line) - len(first_line.lstrip())]
 
             # [KASUS 1] Operator += atau -=
-            if op_match:
-                op = op_match.group(2)
-                val = op_match.group(3)
-                
-                # [ANTI-DUPLIKASI 2] Cek 3 baris ke depan
-                already_present = False
-                for k in range(1, 4):
-                    if i + k < len(self.lines):
-                        next_line = self.lines[i+k]
-                        # Jika ada kata 'totalDeposits' dan ada tanda operasi (=, +=, -=)
-                        if "totalDeposits" in next_line and ("=" in next_line or "+=" in next_line or "-=" in next_line):
-                            already_present = True
-                            print(f"    [SKIP] Logic present at line {i+k+1}")
-                            break
-                
-                if not already_present:
-                    if op == "+=":
-                        new_lines.append(f"{indent}totalDeposits += {val};\n")
-                    elif op == "-=":
-                        new_lines.append(f"{indent}totalDeposits -= {val};\n")
+            if site['op'] in ('+=', '-='):
+                handled_lines.add(line)
+                present = self._mentions_total(line, need_assign=True)
+                if present is not None:
+                    print(f"    [SKIP] Logic present at line {present + 1}")
+                    continue
+                self._insert_before_line(line + 1, f"{indent}totalDeposits {site['op']} {site['value']};\n")
 
             # [KASUS 2] Reset = 0
-            elif reset_match:
-                already_present = False
-                for k in range(1, 4):
-                    if i + k < len(self.lines):
-                        next_line = self.lines[i+k]
-                        if "totalDeposits" in next_line: # Cek sekedar keberadaan variabel
-                            already_present = True
-                            print(f"    [SKIP] Reset logic present at line {i+k+1}")
-                            break
-                
-                if not already_present:
-                    print(f"    [WARN] Balance reset (=0) detected in '{current_function}'. Manual fix needed.")
-                    new_lines.append(f"{indent}// [TODO MANUAL] totalDeposits -= AMOUNT_VAR_HERE;\n")
-
-            i += 1
-        
-        self.lines = new_lines
+            elif site['op'] == '=' and site['value'] == '0':
+                handled_lines.add(line)
+                present = self._mentions_total(line, need_assign=False)
+                if present is not None:
+                    print(f"    [SKIP] Reset logic present at line {present + 1}")
+                    continue
+                print(f"    [WARN] Balance reset (=0) detected in '{site['function']}'. Manual fix needed.")
+                self.manual_fixes += 1
+                self._insert_before_line(line + 1, f"{indent}// [TODO MANUAL] totalDeposits -= AMOUNT_VAR_HERE;\n")
 
     def inject_oracle(self):
-        content = "".join(self.lines)
-        
         # [ANTI-DUPLIKASI 3] Cek keberadaan fungsi Oracle
-        if "function echidna_test_solvency" in content:
+        if self.index.has_function("echidna_test_solvency"):
             print("    [SKIP] Oracle function already exists.")
             return
 
-        # Injeksi di akhir kontrak
-        for i in range(len(self.lines) - 1, -1, -1):
-            if "}" in self.lines[i]:
-                oracle_code = [
-                    "\n",
-                    "    // [AUTO-INSTRUMENTED ORACLE]\n",
-                    "    function echidna_test_solvency() public view returns (bool) {\n",
-                    "        return address(this).balance >= totalDeposits;\n",
-                    "    }\n"
-                ]
-                for code in reversed(oracle_code):
-                    self.lines.insert(i, code)
-                break
+        # Injeksi di akhir kontrak yang memegang mapping
+        contract = self.index.contract(self.mapping['contract'])
+        line = self.index.line_of(contract['end'])
+        self._insert_before_line(line, "".join([
+            "\n",
+            "    // [AUTO-INSTRUMENTED ORACLE]\n",
+            "    function echidna_test_solvency() public view returns (bool) {\n",
+            "        return address(this).balance >= totalDeposits;\n",
+            "    }\n"
+        ]))
+
+    def _insert_before_line(self, line, text):
+        if line >= len(self.lines):
+            # Past the last line: make sure the file ends with a newline first
+            offset = len(self.index.text)
+            if self.index.text and not self.index.text.endswith("\n"):
+                text = "\n" + text
+        else:
+            offset = self.index.line_start(line)
+        self.patches.insert(offset, text)
 
     def save(self):
-        if not os.path.exists(OUTPUT_DIR):
-            os.makedirs(OUTPUT_DIR)
-        save_path = os.path.join(OUTPUT_DIR, self.filename)
-        with open(save_path, 'w', encoding='utf-8') as f:
-            f.writelines(self.lines)
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir, exist_ok=True)
+        save_path = os.path.join(self.output_dir, self.filename)
+        SourceBuffer(self.index.text).write(save_path, self.patches)
         print(f"    [SUCCESS] Saved to {save_path}")
 
-if __name__ == "__main__":
-    if not os.path.exists(INPUT_DIR):
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def instrument_file(path, output_dir):
+    """
+    Worker entry point (process pool): instrument one file, capturing its
+    console output so the parent can print it without interleaving
+    """
+    log = io.StringIO()
+    source_hash = None
+    with contextlib.redirect_stdout(log):
+        try:
+            # Inside the try: a missing/unreadable input is this file's error, not the batch's
+            source_hash = file_hash(path)
+            tool = Instrument(path, output_dir)
+            status = tool.run()
+            manual_fixes = tool.manual_fixes
+        except Exception as e:
+            print(f"    [!] Error: {e}")
+            status, manual_fixes = 'error', 0
+    return {
+        'file': os.path.basename(path),
+        'status': status,
+        'manual_fixes': manual_fixes,
+        'source_hash': source_hash,
+        'log': log.getvalue()
+    }
+
+def instrument_file_profiled(path, output_dir, cprofile_dir=None):
+    """Process-pool entry with profiling on: spans go back to the parent with the result"""
+    profiling.PROFILER.enable_worker(cprofile_dir, "instrument worker")
+    with span('instrument', file=os.path.basename(path)):
+        result = instrument_file(path, output_dir)
+    result['profile'] = profiling.PROFILER.drain()
+    return result
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(path + ".tmp", 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def collect_inputs(inputs):
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files.extend(sorted(glob.glob(os.path.join(item, "*.sol"))))
+        else:
+            files.append(item)
+    return files
+
+def main():
+    parser = argparse.ArgumentParser(description="Instrument contracts with a totalDeposits solvency oracle")
+    parser.add_argument("inputs", nargs="*", default=[INPUT_DIR], help=".sol files or directories")
+    parser.add_argument("-o", "--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="Process pool size (0 = number of CPUs)")
+    parser.add_argument("--force", action="store_true", help="Re-instrument even if output is up to date")
+    parser.add_argument("--report", default=None,
+                        help="Machine-readable report path (default: <output-dir>/instrument_report.json)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.from_args(args, "instrument.py")
+
+    if args.inputs == [INPUT_DIR] and not os.path.exists(INPUT_DIR):
         os.makedirs(INPUT_DIR)
         print(f"[!] Folder '{INPUT_DIR}' created. Please add contracts.")
-    else:
-        files = glob.glob(os.path.join(INPUT_DIR, "*.sol"))
-        print(f"[*] Found {len(files)} contracts. Starting instrumentation...\n")
-        for f in files:
-            tool = Instrument(f)
-            tool.run()
-        print("\n[DONE] Check 'ready-contracts/' folder.")
\ No newline at end of file
+        return
+
+    files = collect_inputs(args.inputs)
+    os.makedirs(args.output_dir, exist_ok=True)
+    print(f"[*] Found {len(files)} contracts. Starting instrumentation...\n")
+
+    # [IDEMPOTEN] Lewati file yang hash sumber + versi instrumentasinya sama
+    manifest = load_manifest(args.output_dir)
+    todo, results = [], []
+    for path in files:
+        name = os.path.basename(path)
+        entry = manifest.get(name)
+        try:
+            source_hash = file_hash(path) if entry and not args.force else None
+        except OSError:
+            source_hash = None  # Unreadable: instrument_file reports it as an error
+        if (source_hash is not None
+                and entry.get('version') == INSTRUMENT_VERSION
+                and entry.get('source_hash') == source_hash
+                and os.path.exists(os.path.join(args.output_dir, name))):
+            results.append({'file': name, 'status': 'skipped', 'manual_fixes': entry.get('manual_fixes', 0)})
+        else:
+            todo.append(path)
+
+    workers = args.workers or os.cpu_count() or 1
+    with span('instrument stage', cat='stage', files=len(todo)):
+        if workers > 1 and len(todo) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                if profiling.PROFILER.enabled:
+                    done = pool.map(instrument_file_profiled, todo, [args.output_dir] * len(todo),
+                                    [args.cprofile] * len(todo), chunksize=16)
+                else:
+                    done = pool.map(instrument_file, todo, [args.output_dir] * len(todo), chunksize=16)
+                for result in done:
+                    if 'profile' in result:
+                        profiling.PROFILER.merge(result.pop('profile'))
+                    sys.stdout.write(result['log'])
+                    results.append(result)
+        else:
+            for path in todo:
+                with span('instrument', file=os.path.basename(path)):
+                    result = instrument_file(path, args.output_dir)
+                sys.stdout.write(result['log'])
+                results.append(result)
+
+    for result in results:
+        if result['status'] == 'instrumented':
+            manifest[result['file']] = {
+                'source_hash': result['source_hash'],
+                'version': INSTRUMENT_VERSION,
+                'manual_fixes': result['manual_fixes']
+            }
+    save_manifest(args.output_dir, manifest)
+
+    report = {
+        'version': INSTRUMENT_VERSION,
+        'total': len(files),
+        'instrumented': sum(1 for r in results if r['status'] == 'instrumented'),
+        'skipped': sum(1 for r in results if r['status'] == 'skipped'),
+        'mapping_not_found': sum(1 for r in results if r['status'] == 'mapping_not_found'),
+        'manual_fix_needed': sum(1 for r in results if r['manual_fixes'] > 0),
+        'errors': sum(1 for r in results if r['status'] == 'error'),
+        'files': sorted(({k: r[k] for k in ('file', 'status', 'manual_fixes')} for r in results),
+                        key=lambda r: r['file'])
+    }
+    report_path = args.report or os.path.join(args.output_dir, "instrument_report.json")
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n[DONE] Instrumented: {report['instrumented']}, skipped: {report['skipped']}, "
+          f"mapping not found: {report['mapping_not_found']}, manual fix needed: {report['manual_fix_needed']}, "
+          f"errors: {report['errors']}")
+    print(f"[DONE] Check '{args.output_dir}/' folder. Report: {report_path}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Lease-Based Job Queue
+Lets any number of run.py worker processes (one host or many sharing a
+filesystem) split a campaign. A worker claims a contract with a lease that
+it renews while echidna runs; when a worker dies its lease expires and the
+job is handed to someone else. Results are stored with the job, so the
+merged summary comes out in the same order as a single-host run.
+"""
+
+import json
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Tuple
+
+DEFAULT_LEASE = 60           # seconds; renewed every LEASE/3 while a job runs
+MAX_ATTEMPTS = 3             # claims per job before it is failed for good
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    file           TEXT PRIMARY KEY,
+    position       INTEGER NOT NULL,
+    priority       REAL NOT NULL DEFAULT 0,
+    status         TEXT NOT NULL DEFAULT 'pending',   -- pending | leased | done
+    owner          TEXT,
+    lease_expires  REAL,
+    attempts       INTEGER NOT NULL DEFAULT 0,
+    result         TEXT,
+    updated_at     REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, priority, position);
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT
+);
+"""
+
+class JobQueue:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # isolation_level=None: transactions are explicit (BEGIN IMMEDIATE
+        # takes the write lock up front, so two workers never claim one job)
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None,
+                                    check_same_thread=False)
+        # Rollback journal, not WAL: WAL needs shared memory, which hosts
+        # sharing the file over a network filesystem do not have
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _write(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = self.conn.execute(sql, params)
+                self.conn.execute("COMMIT")
+                return cur
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, jobs: List[Tuple[int, str, float]]):
+        """(position, file, priority); files already queued keep their entry"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO jobs (file, position, priority, updated_at) VALUES (?, ?, ?, ?)",
+                    [(f, pos, prio, time.time()) for pos, f, prio in jobs])
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def claim(self, worker: str, lease: float = DEFAULT_LEASE) -> Optional[Dict]:
+        """
+        Next pending job (highest priority first), or a leased one whose
+        lease expired (crashed worker). None when nothing is claimable now.
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self.conn.execute(
+                        "SELECT file, position, attempts FROM jobs "
+                        "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                        "ORDER BY priority DESC, position LIMIT 1", (now,)).fetchone()
+                    if row is None:
+                        self.conn.execute("COMMIT")
+                        return None
+                    file, position, attempts = row
+                    if attempts < MAX_ATTEMPTS:
+                        break
+                    # Crashed every worker that took it: fail it and look at the next one
+                    self.conn.execute(
+                        "UPDATE jobs SET status = 'done', owner = NULL, result = ?, updated_at = ? "
+                        "WHERE file = ?",
+                        (json.dumps({'file': file, 'status': 'ERROR', 'detected': False, 'time': 0,
+                                     'log_file': None, 'error': f'lease expired {attempts} times'}),
+                         now, file))
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'leased', owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE file = ?",
+                    (worker, now + lease, now, file))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return {'file': file, 'position': position, 'attempt': attempts + 1}
+
+    def renew(self, file: str, worker: str, lease: float = DEFAULT_LEASE) -> bool:
+        """Extend our lease; False if the job was reclaimed or finished meanwhile"""
+        cur = self._write(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+            "WHERE file = ? AND owner = ? AND status = 'leased'",
+            (time.time() + lease, time.time(), file, worker))
+        return cur.rowcount == 1
+
+    def complete(self, file: str, worker: str, result: Dict) -> bool:
+        """Store the result; the first completion wins if a job ran twice"""
+        cur = self._write(
+            "UPDATE jobs SET status = 'done', owner = ?, result = ?, updated_at = ? "
+            "WHERE file = ? AND status != 'done'",
+            (worker, json.dumps(result), time.time(), file))
+        return cur.rowcount == 1
+
+    def unfinished(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM jobs WHERE status != 'done'").fetchone()[0]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def results(self) -> List[Tuple[int, Dict]]:
+        """(position, result) of finished jobs in submission order"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT position, result FROM jobs WHERE status = 'done' ORDER BY position").fetchall()
+        return [(position, json.loads(result)) for position, result in rows]
+
+    def claim_merge(self) -> bool:
+        """True for exactly one caller once all jobs are done (that one writes the summary)"""
+        cur = self._write("INSERT OR IGNORE INTO meta (key, value) VALUES ('merged', ?)",
+                          (str(time.time()),))
+        return cur.rowcount == 1
+
+class LeaseKeeper:
+    """Renews a job's lease in the background while it runs"""
+
+    def __init__(self, queue: JobQueue, file: str, worker: str, lease: float = DEFAULT_LEASE):
+        self.queue = queue
+        self.file = file
+        self.worker = worker
+        self.lease = lease
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.lease / 3):
+            try:
+                if not self.queue.renew(self.file, self.worker, self.lease):
+                    return
+            except sqlite3.Error:
+                continue  # Busy database: retry at the next interval
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
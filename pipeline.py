@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Streaming Pipeline: inject -> verify -> fuzz
+Stages run concurrently and are connected by bounded queues, so every
+variant is compiled and fuzzed as soon as it is generated. Variants that
+fail to compile are dropped before they reach EchidnaRunner.
+"""
+
+import os
+import sys
+import glob
+import json
+import queue
+import asyncio
+import threading
+import importlib.util
+from typing import List, Dict, Optional, Tuple
+
+from compile_cache import CompileCache, DEFAULT_CACHE_DIR
+from run import EchidnaRunner, error_line
+from async_exec import run_async
+import profiling
+from profiling import span
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+_DONE = object()  # End-of-stream marker, one per consumer
+
+def load_script(filename: str, module_name: str):
+    """Import one of the hyphenated scripts (bug-injector.py, verify-contracts.py)"""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(HERE, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+bug_injector = load_script("bug-injector.py", "bug_injector")
+verify_contracts = load_script("verify-contracts.py", "verify_contracts")
+
+class Pipeline:
+    def __init__(self, sources: List[str], work_dir: str = "injected-contracts",
+                 output_dir: str = "echidna-results", packed: Optional[str] = None,
+                 compile_workers: int = 2, fuzz_workers: Optional[int] = None,
+                 queue_depth: int = 8, timeout: int = 120,
+                 cache: Optional[CompileCache] = None, keep_variants: bool = False,
+                 backend: str = "threads", precompiled: bool = False):
+        self.sources = sources
+        self.work_dir = work_dir
+        self.packed = packed
+        self.compile_workers = compile_workers
+        self.cache = cache
+        self.keep_variants = keep_variants
+        self.backend = backend
+        self.queue_depth = queue_depth
+        os.makedirs(work_dir, exist_ok=True)
+
+        self.runner = EchidnaRunner(work_dir, output_dir, timeout=timeout,
+                                    workers=fuzz_workers, cache=cache, precompiled=precompiled)
+        self.fuzz_workers = self.runner.workers
+
+        # Bounded: a full queue blocks the stage before it, which caps how many
+        # variant files can exist on disk at once
+        self.compile_queue = queue.Queue(maxsize=queue_depth)
+        self.fuzz_queue = queue.Queue(maxsize=queue_depth)
+
+        self._lock = threading.Lock()
+        self.fuzz_results = {}     # seq -> result
+        self.dropped = []          # (file, error) for compile failures
+        self.generated = 0
+
+    def _inject_stage(self):
+        seq = 0
+        try:
+            for source in self.sources:
+                print(f"[Inject] {os.path.basename(source)}")
+                try:
+                    injector = bug_injector.ReentrancyInjector(source, self.work_dir, self.runner.store)
+                    for fname, patches, entries in injector.iter_variants(self.packed):
+                        with span('write', file=fname, profile=True):
+                            path = injector.write_variant(fname, patches, entries)
+                        self.compile_queue.put((seq, path))
+                        seq += 1
+                    # Logs are needed by the per-variant summary in EchidnaRunner
+                    injector.save_log()
+                except Exception as e:
+                    print(f"[ERROR] Injection failed for {source}: {e}")
+        finally:
+            self.generated = seq
+            for _ in range(self.compile_workers):
+                self.compile_queue.put(_DONE)
+
+    def _compile_failed(self, error: Exception) -> Tuple[bool, str]:
+        # Never let a worker die: the inject stage would block on a full queue
+        return False, f"Compile stage error: {error}"
+
+    def _fuzz_failed(self, path: str, seq: int, error: Exception) -> Dict:
+        # Never let a worker die: the compile stage would block on a full queue
+        result = {'file': os.path.basename(path), 'contract': '', 'status': 'ERROR',
+                  'detected': False, 'time': 0, 'log_file': None, 'output_tail': str(error),
+                  'error': error_line(error) or type(error).__name__}
+        try:
+            self.runner.record(result, seq)
+        except Exception as e:
+            print(f"[WARN] Could not record {result['file']}: {e}")
+        return result
+
+    def _drop(self, path: str, message: str):
+        with self._lock:
+            self.dropped.append((os.path.basename(path), message))
+            print(f"[Drop] {os.path.basename(path)} - {message}")
+        self._discard(path)
+
+    def _discard(self, path: str):
+        """Delete a finished variant unless --keep-variants"""
+        if self.keep_variants:
+            return
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"[WARN] Could not remove {os.path.basename(path)}: {e}")
+
+    def _compile_stage(self):
+        while True:
+            item = self.compile_queue.get()
+            if item is _DONE:
+                break
+            seq, path = item
+            try:
+                success, message = verify_contracts.verify_contract(path, self.cache)
+                self.runner.store.add_compile(os.path.basename(path), success, message)
+            except Exception as e:
+                success, message = self._compile_failed(e)
+            if success:
+                self.fuzz_queue.put((seq, path))
+            else:
+                self._drop(path, message)
+
+    def _fuzz_stage(self):
+        while True:
+            item = self.fuzz_queue.get()
+            if item is _DONE:
+                break
+            seq, path = item
+            try:
+                result = self.runner.run_job(path, seq)
+            except Exception as e:
+                result = self._fuzz_failed(path, seq, e)
+            with self._lock:
+                self.fuzz_results[seq] = result
+            self._discard(path)
+
+    def _iter_variant_files(self):
+        """Write variants one at a time (used by the asyncio backend)"""
+        for source in self.sources:
+            print(f"[Inject] {os.path.basename(source)}")
+            try:
+                injector = bug_injector.ReentrancyInjector(source, self.work_dir, self.runner.store)
+                for fname, patches, entries in injector.iter_variants(self.packed):
+                    with span('write', file=fname, profile=True):
+                        path = injector.write_variant(fname, patches, entries)
+                    yield path
+                injector.save_log()
+            except Exception as e:
+                print(f"[ERROR] Injection failed for {source}: {e}")
+
+    async def _run_async(self):
+        """
+        Same stages as coroutines: hundreds of solc jobs and a few echidna
+        jobs in flight on one event loop, bounded by asyncio.Queue depths
+        """
+        compile_queue = asyncio.Queue(maxsize=self.queue_depth)
+        fuzz_queue = asyncio.Queue(maxsize=self.queue_depth)
+        compile_limit = asyncio.Semaphore(self.compile_workers)
+        fuzz_limit = asyncio.Semaphore(self.fuzz_workers)
+
+        async def inject():
+            seq = 0
+            variants = self._iter_variant_files()
+            try:
+                while True:
+                    # Injection is Python work: keep it off the event loop
+                    path = await asyncio.to_thread(next, variants, None)
+                    if path is None:
+                        break
+                    await compile_queue.put((seq, path))
+                    seq += 1
+            finally:
+                self.generated = seq
+                for _ in range(self.compile_workers):
+                    await compile_queue.put(_DONE)
+
+        async def compile_worker():
+            while True:
+                item = await compile_queue.get()
+                if item is _DONE:
+                    break
+                seq, path = item
+                try:
+                    success, message = await verify_contracts.verify_contract_async(path, self.cache, compile_limit)
+                    self.runner.store.add_compile(os.path.basename(path), success, message)
+                except Exception as e:
+                    success, message = self._compile_failed(e)
+                if success:
+                    await fuzz_queue.put((seq, path))
+                else:
+                    self._drop(path, message)
+
+        async def fuzz_worker():
+            while True:
+                item = await fuzz_queue.get()
+                if item is _DONE:
+                    break
+                seq, path = item
+                try:
+                    self.fuzz_results[seq] = await self.runner.run_job_async(path, fuzz_limit, seq)
+                except Exception as e:
+                    self.fuzz_results[seq] = self._fuzz_failed(path, seq, e)
+                self._discard(path)
+
+        fuzzers = [asyncio.create_task(fuzz_worker()) for _ in range(self.fuzz_workers)]
+        await asyncio.gather(inject(), *(compile_worker() for _ in range(self.compile_workers)))
+        for _ in fuzzers:
+            await fuzz_queue.put(_DONE)
+        await asyncio.gather(*fuzzers)
+
+    def run(self) -> List[Dict]:
+        print(f"[INFO] Pipeline: {len(self.sources)} source contracts, "
+              f"{self.compile_workers} compile / {self.fuzz_workers} fuzz workers ({self.backend})")
+        print("=" * 60)
+        self.runner.prepare_journal()
+
+        if self.backend == "asyncio":
+            run_async(self._run_async())
+            return self._finish()
+
+        injector = threading.Thread(target=self._inject_stage, name="inject")
+        compilers = [threading.Thread(target=self._compile_stage, name=f"compile-{i}")
+                     for i in range(self.compile_workers)]
+        fuzzers = [threading.Thread(target=self._fuzz_stage, name=f"fuzz-{i}")
+                   for i in range(self.fuzz_workers)]
+
+        for t in [injector] + compilers + fuzzers:
+            t.start()
+
+        injector.join()
+        for t in compilers:
+            t.join()
+        for _ in fuzzers:
+            self.fuzz_queue.put(_DONE)
+        for t in fuzzers:
+            t.join()
+
+        return self._finish()
+
+    def _finish(self) -> List[Dict]:
+        # Generation order -> same summary as the stage-by-stage scripts
+        self.runner.results = [self.fuzz_results[seq] for seq in sorted(self.fuzz_results)]
+        with span('summary', cat='stage'):
+            self.runner._generate_summary()
+            self._write_pipeline_summary()
+        return self.runner.results
+
+    def _write_pipeline_summary(self):
+        summary = {
+            'generated': self.generated,
+            'compiled': self.generated - len(self.dropped),
+            'dropped': [{'file': f, 'error': e} for f, e in self.dropped],
+            'fuzzed': len(self.runner.results)
+        }
+        path = os.path.join(self.runner.output_dir, "pipeline_summary.json")
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Pipeline:           {summary['generated']} generated, {len(self.dropped)} dropped "
+              f"(compile), {summary['fuzzed']} fuzzed -> {path}")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inject -> verify -> fuzz in one streaming pipeline")
+    parser.add_argument("sources", nargs="+", help="Source contracts (.sol files or directories)")
+    parser.add_argument("--work-dir", default="injected-contracts", help="Where variants are written")
+    parser.add_argument("--output-dir", default="echidna-results", help="Results directory")
+    parser.add_argument("--packed", choices=["mapping", "all"], default=None,
+                        help="Generate packed variants (see bug-injector.py --packed)")
+    parser.add_argument("--compile-workers", type=int, default=2)
+    parser.add_argument("--fuzz-workers", type=int, default=None, help="Default: number of CPUs")
+    parser.add_argument("--queue-depth", type=int, default=8, help="Max variants waiting per stage")
+    parser.add_argument("--timeout", type=int, default=120, help="Per-contract echidna timeout")
+    parser.add_argument("--keep-variants", action="store_true",
+                        help="Keep variant files after fuzzing (disk use is no longer bounded)")
+    parser.add_argument("--backend", choices=["threads", "asyncio"], default="threads",
+                        help="asyncio: run solc/echidna as coroutines (use a large --compile-workers)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Compile cache directory")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--precompiled", action="store_true",
+                        help="Fuzz from cached crytic-compile exports (see run.py --precompiled)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    
+    if args.precompiled and args.no_cache:
+        parser.error("--precompiled stores its artifacts in the compile cache; drop --no-cache")
+    profiling.from_args(args, "pipeline.py")
+
+    sources = []
+    for item in args.sources:
+        if os.path.isdir(item):
+            sources.extend(sorted(glob.glob(os.path.join(item, "*.sol"))))
+        else:
+            sources.append(item)
+    if not sources:
+        print("[ERROR] No source contracts found")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("Reentrancy Injection Pipeline")
+    print("=" * 60)
+
+    cache = None if args.no_cache else CompileCache(args.cache_dir)
+    Pipeline(sources, args.work_dir, args.output_dir, packed=args.packed,
+             compile_workers=args.compile_workers, fuzz_workers=args.fuzz_workers,
+             queue_depth=args.queue_depth, timeout=args.timeout, cache=cache,
+             keep_variants=args.keep_variants, backend=args.backend,
+             precompiled=args.precompiled).run()
+
+if __name__ == "__main__":
+    main()
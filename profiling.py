@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Stage Profiling
+Opt-in timing spans for the four scripts: one span per stage and per
+per-file step (read, index, detect mappings, inject, write, compile, fuzz,
+parse). Spans are exported as a Chrome trace / Perfetto JSON timeline (one
+row per worker thread or asyncio task, so idle workers show up as gaps);
+Python-side steps can also be cProfiled, one merged .prof per step name.
+Disabled (the default) a span only checks a flag.
+"""
+
+import os
+import re
+import json
+import time
+import atexit
+import asyncio
+import cProfile
+import pstats
+import threading
+import contextlib
+from typing import Dict, Optional
+
+class _LoadedStats:
+    """Profile stats received from a worker process, in the shape pstats.Stats accepts"""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.trace_path = None
+        self.cprofile_dir = None
+        self._events = []
+        self._stats = {}          # step name -> pstats.Stats (merged over files)
+        self._threads = {}        # (pid, tid) -> row name
+        self._lock = threading.Lock()
+        # Only one cProfile can be active per process; others skip it
+        self._cprofile_busy = threading.Lock()
+        self._named_pid = None
+
+    def enable(self, trace_path: Optional[str] = None, cprofile_dir: Optional[str] = None,
+               process_name: Optional[str] = None):
+        self.enabled = True
+        self.trace_path = trace_path
+        self.cprofile_dir = cprofile_dir
+        if process_name and self._named_pid != os.getpid():
+            self._named_pid = os.getpid()
+            self._events.append({'name': 'process_name', 'ph': 'M', 'pid': os.getpid(),
+                                 'args': {'name': process_name}})
+
+    def enable_worker(self, cprofile_dir: Optional[str], process_name: str):
+        """In a pool worker process: record spans to drain() back to the parent"""
+        self.enable(None, cprofile_dir, process_name)
+
+    def _after_fork(self):
+        """A forked child starts empty (the parent keeps its own events) with fresh locks"""
+        self._events, self._stats, self._threads = [], {}, {}
+        self._lock = threading.Lock()
+        self._cprofile_busy = threading.Lock()
+
+    def _row(self):
+        """(tid, name) of the current asyncio task, else of the current thread"""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is not None:
+            return id(task) & 0x7fffffff, task.get_name()
+        thread = threading.current_thread()
+        return thread.ident, thread.name
+
+    @contextlib.contextmanager
+    def span(self, name: str, cat: str = 'step', profile: bool = False, **args):
+        """
+        Time a block; profile=True also cProfiles it when --cprofile is on.
+        Yields the span's args dict, so outcomes can be attached on the way out.
+        """
+        if not self.enabled:
+            yield args
+            return
+
+        prof = None
+        if profile and self.cprofile_dir and self._cprofile_busy.acquire(blocking=False):
+            prof = cProfile.Profile()
+            try:
+                prof.enable()
+            except ValueError:  # Another profiler is active (e.g. under `python -m cProfile`)
+                self._cprofile_busy.release()
+                prof = None
+
+        tid, row = self._row()
+        start = time.time_ns() // 1000  # Wall clock in µs: comparable across processes
+        try:
+            yield args
+        finally:
+            end = time.time_ns() // 1000
+            if prof is not None:
+                prof.disable()
+                self._cprofile_busy.release()
+            event = {'name': name, 'cat': cat, 'ph': 'X', 'ts': start, 'dur': end - start,
+                     'pid': os.getpid(), 'tid': tid}
+            if args:
+                event['args'] = args
+            with self._lock:
+                self._events.append(event)
+                self._threads.setdefault((os.getpid(), tid), row)
+                if prof is not None:
+                    if name in self._stats:
+                        self._stats[name].add(prof)
+                    else:
+                        self._stats[name] = pstats.Stats(prof)
+
+    def drain(self) -> Dict:
+        """Events + profile stats recorded so far (a worker process returns these to its parent)"""
+        with self._lock:
+            data = {
+                'events': self._events + self._metadata(),
+                'stats': {name: stats.stats for name, stats in self._stats.items()},
+            }
+            self._events, self._stats, self._threads = [], {}, {}
+        return data
+
+    def merge(self, data: Dict):
+        """Add what a worker process drained"""
+        with self._lock:
+            self._events.extend(data['events'])
+            for name, stats in data['stats'].items():
+                if name in self._stats:
+                    self._stats[name].add(_LoadedStats(stats))
+                else:
+                    self._stats[name] = pstats.Stats(_LoadedStats(stats))
+
+    def _metadata(self):
+        return [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': row}}
+                for (pid, tid), row in self._threads.items()]
+
+    def write(self):
+        """Write the trace JSON and the .prof dumps (registered atexit by from_args)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            events = self._events + self._metadata()
+            stats = dict(self._stats)
+        if self.trace_path:
+            if os.path.dirname(self.trace_path):
+                os.makedirs(os.path.dirname(self.trace_path), exist_ok=True)
+            with open(self.trace_path, 'w') as f:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+            print(f"[Profile] Trace: {self.trace_path} ({len(events)} events; open in ui.perfetto.dev)")
+        if self.cprofile_dir and stats:
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+            for name, step_stats in stats.items():
+                step_stats.dump_stats(os.path.join(self.cprofile_dir, re.sub(r'[^\w.-]', '_', name) + ".prof"))
+            print(f"[Profile] cProfile: {len(stats)} steps in {self.cprofile_dir}/")
+
+PROFILER = Profiler()
+span = PROFILER.span
+os.register_at_fork(after_in_child=PROFILER._after_fork)
+
+def add_arguments(parser):
+    """--trace / --cprofile, the same in every script"""
+    parser.add_argument("--trace", default=None, metavar="TRACE_JSON",
+                        help="Record stage/step spans and write a Chrome trace (Perfetto) JSON")
+    parser.add_argument("--cprofile", default=None, metavar="DIR",
+                        help="Also cProfile the Python-side steps, one .prof per step in DIR")
+
+def from_args(args, process_name: str):
+    """Enable profiling when --trace/--cprofile were given; outputs are written at exit"""
+    if args.trace or args.cprofile:
+        PROFILER.enable(args.trace, args.cprofile, process_name)
+        atexit.register(PROFILER.write)
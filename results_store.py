@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+SQLite Results Store
+Holds injection metadata, compile outcomes and every fuzz run, appended
+transactionally as each job completes. detection_results.csv / summary.json
+are exports from this store.
+"""
+
+import os
+import csv
+import json
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Optional
+
+DEFAULT_DB_NAME = "results.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    name        TEXT NOT NULL,
+    output_dir  TEXT,
+    started_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS injections (
+    file             TEXT NOT NULL,
+    source_contract  TEXT,
+    target           TEXT,
+    bug              TEXT,
+    property         TEXT,
+    packed           INTEGER DEFAULT 0,
+    PRIMARY KEY (file, bug, target)
+);
+CREATE TABLE IF NOT EXISTS compiles (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    file        TEXT NOT NULL,
+    success     INTEGER NOT NULL,
+    message     TEXT,
+    created_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fuzz_runs (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    campaign_id  INTEGER NOT NULL REFERENCES campaigns(id),
+    position     INTEGER,
+    file         TEXT NOT NULL,
+    contract     TEXT,
+    status       TEXT NOT NULL,
+    detected     INTEGER NOT NULL,
+    time         REAL,
+    wall_time    REAL,
+    seed         INTEGER,
+    log_path     TEXT,
+    extra        TEXT,
+    created_at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS falsified (
+    run_id    INTEGER NOT NULL REFERENCES fuzz_runs(id),
+    property  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runtimes (
+    digest      TEXT NOT NULL,
+    file        TEXT NOT NULL,
+    test_limit  INTEGER,
+    timeout     REAL,
+    units       REAL,
+    wall_time   REAL NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS telemetry (
+    run_id        INTEGER PRIMARY KEY REFERENCES fuzz_runs(id),
+    compile_time  REAL,
+    startup_time  REAL,
+    fuzz_time     REAL,
+    tests         INTEGER,
+    tests_per_s   REAL,
+    coverage      INTEGER,
+    corpus        INTEGER,
+    gas_per_s     INTEGER,
+    series_path   TEXT
+);
+CREATE TABLE IF NOT EXISTS property_times (
+    run_id    INTEGER NOT NULL REFERENCES fuzz_runs(id),
+    property  TEXT NOT NULL,
+    seconds   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_injections_bug ON injections(bug);
+CREATE INDEX IF NOT EXISTS idx_injections_target ON injections(target);
+CREATE INDEX IF NOT EXISTS idx_injections_source ON injections(source_contract);
+CREATE INDEX IF NOT EXISTS idx_compiles_file ON compiles(file);
+CREATE INDEX IF NOT EXISTS idx_fuzz_runs_campaign ON fuzz_runs(campaign_id, position);
+CREATE INDEX IF NOT EXISTS idx_fuzz_runs_file ON fuzz_runs(file);
+CREATE INDEX IF NOT EXISTS idx_falsified_run ON falsified(run_id, property);
+CREATE INDEX IF NOT EXISTS idx_runtimes_digest ON runtimes(digest, test_limit);
+CREATE INDEX IF NOT EXISTS idx_runtimes_file ON runtimes(file, test_limit);
+CREATE INDEX IF NOT EXISTS idx_property_times_run ON property_times(run_id);
+"""
+
+# Columns of fuzz_runs that mirror EchidnaRunner result keys
+RUN_FIELDS = ('file', 'contract', 'status', 'detected', 'time', 'wall_time', 'seed')
+
+# Columns of the telemetry table (keys of a result's 'telemetry' dict)
+TELEMETRY_FIELDS = ('compile_time', 'startup_time', 'fuzz_time', 'tests', 'tests_per_s',
+                    'coverage', 'corpus', 'gas_per_s')
+
+# GROUP BY keys accepted by detection_rate()
+GROUP_COLUMNS = {'bug': 'i.bug', 'target': 'i.target', 'source': 'i.source_contract'}
+
+class ResultsStore:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # One connection shared by worker threads, serialized by a lock;
+        # WAL lets other processes read (and append) while a campaign runs
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.conn.close()
+
+    # ---------------------------------------------------------------- writes
+
+    def start_campaign(self, name: str, output_dir: Optional[str] = None) -> int:
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO campaigns (name, output_dir, started_at) VALUES (?, ?, ?)",
+                (name, output_dir, time.time()))
+            return cur.lastrowid
+
+    def add_injections(self, entries: List[Dict], source_contract: Optional[str] = None):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO injections (file, source_contract, target, bug, property, packed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(e['file'], e.get('source', source_contract), e.get('target'), e.get('bug'),
+                  e.get('property'), int(bool(e.get('packed')))) for e in entries])
+
+    def add_compile(self, file: str, success: bool, message: str):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO compiles (file, success, message, created_at) VALUES (?, ?, ?, ?)",
+                (file, int(success), message, time.time()))
+
+    def add_fuzz_run(self, campaign_id: int, result: Dict, position: Optional[int] = None) -> int:
+        """Append one finished run (and its falsified properties) in one transaction"""
+        extra = {k: v for k, v in result.items()
+                 if k not in RUN_FIELDS and k not in ('log_file', 'falsified', 'output_tail', 'telemetry')}
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO fuzz_runs (campaign_id, position, file, contract, status, detected, time, "
+                "wall_time, seed, log_path, extra, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (campaign_id, position, result['file'], result.get('contract'), result['status'],
+                 int(bool(result['detected'])), result.get('time'), result.get('wall_time'),
+                 result.get('seed'),
+                 result.get('log_file'), json.dumps(extra) if extra else None, time.time()))
+            run_id = cur.lastrowid
+            self.conn.executemany(
+                "INSERT INTO falsified (run_id, property) VALUES (?, ?)",
+                [(run_id, prop) for prop in result.get('falsified', [])])
+            telemetry = result.get('telemetry')
+            if telemetry:
+                self.conn.execute(
+                    f"INSERT INTO telemetry (run_id, {', '.join(TELEMETRY_FIELDS)}, series_path) "
+                    f"VALUES (?, {', '.join('?' * len(TELEMETRY_FIELDS))}, ?)",
+                    (run_id, *(telemetry.get(k) for k in TELEMETRY_FIELDS), telemetry.get('series')))
+                self.conn.executemany(
+                    "INSERT INTO property_times (run_id, property, seconds) VALUES (?, ?, ?)",
+                    [(run_id, prop, seconds) for prop, seconds in telemetry.get('property_times', {}).items()])
+            return run_id
+
+    def add_runtime(self, digest: str, file: str, test_limit: Optional[int], timeout: Optional[float],
+                    units: float, wall_time: float):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO runtimes (digest, file, test_limit, timeout, units, wall_time, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (digest, file, test_limit, timeout, units, wall_time, time.time()))
+
+    # --------------------------------------------------------------- queries
+
+    def mean_runtime(self, column: str, value: str, test_limit: Optional[int]) -> Optional[float]:
+        """Mean wall time of earlier runs with the same digest or file name (and test limit)"""
+        assert column in ('digest', 'file')
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT AVG(wall_time) FROM runtimes WHERE {column} = ? AND test_limit IS ?",
+                (value, test_limit)).fetchone()
+        return row[0]
+
+    def runtime_rates(self, limit: int = 1000) -> List[float]:
+        """Seconds per complexity unit of the most recent runs"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT wall_time / units FROM runtimes WHERE units > 0 ORDER BY created_at DESC LIMIT ?",
+                (limit,)).fetchall()
+        return [row[0] for row in rows]
+
+    def campaign_results(self, campaign_id: int) -> List[Dict]:
+        """Runs of one campaign in submission order, shaped like EchidnaRunner results"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM fuzz_runs WHERE campaign_id = ? ORDER BY position, id",
+                (campaign_id,)).fetchall()
+            falsified = {}
+            for row in self.conn.execute(
+                    "SELECT f.run_id, f.property FROM falsified f JOIN fuzz_runs r ON r.id = f.run_id "
+                    "WHERE r.campaign_id = ?", (campaign_id,)):
+                falsified.setdefault(row['run_id'], []).append(row['property'])
+            telemetry = {}
+            for row in self.conn.execute(
+                    "SELECT t.* FROM telemetry t JOIN fuzz_runs r ON r.id = t.run_id "
+                    "WHERE r.campaign_id = ?", (campaign_id,)):
+                telemetry[row['run_id']] = {k: row[k] for k in TELEMETRY_FIELDS}
+                telemetry[row['run_id']].update(series=row['series_path'], property_times={})
+            for row in self.conn.execute(
+                    "SELECT p.run_id, p.property, p.seconds FROM property_times p "
+                    "JOIN fuzz_runs r ON r.id = p.run_id WHERE r.campaign_id = ?", (campaign_id,)):
+                telemetry[row['run_id']]['property_times'][row['property']] = row['seconds']
+
+        results = []
+        for row in rows:
+            result = {
+                'file': row['file'],
+                'contract': row['contract'],
+                'status': row['status'],
+                'detected': bool(row['detected']),
+                'time': row['time'],
+                'log_file': row['log_path'],
+            }
+            if row['wall_time'] is not None:
+                result['wall_time'] = row['wall_time']
+            if row['seed'] is not None:
+                result['seed'] = row['seed']
+            result['falsified'] = sorted(falsified.get(row['id'], []))
+            if row['id'] in telemetry:
+                result['telemetry'] = telemetry[row['id']]
+            if row['extra']:
+                result.update(json.loads(row['extra']))
+            results.append(result)
+        return results
+
+    def variant_results(self, campaign_id: int) -> List[Dict]:
+        """
+        One row per injected variant: detected when its own property was
+        falsified (whole-file verdict for logs without a property name)
+        """
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT r.file, i.target, i.bug, COALESCE(i.property, '') AS property, r.status,
+                       CASE WHEN i.property IS NULL THEN r.detected
+                            ELSE EXISTS (SELECT 1 FROM falsified f
+                                         WHERE f.run_id = r.id AND f.property = i.property)
+                       END AS detected
+                FROM fuzz_runs r JOIN injections i ON i.file = r.file
+                WHERE r.campaign_id = ?
+                ORDER BY r.position, r.id, i.rowid
+            """, (campaign_id,)).fetchall()
+        return [{**dict(row), 'detected': bool(row['detected'])} for row in rows]
+
+    def detection_rate(self, by: str = 'bug', campaign_id: Optional[int] = None) -> List[Dict]:
+        """Detection rate per variant / mapping / source contract, across campaigns or for one"""
+        column = GROUP_COLUMNS[by]
+        where = "WHERE r.campaign_id = ?" if campaign_id is not None else ""
+        params = (campaign_id,) if campaign_id is not None else ()
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT {column} AS key, COUNT(*) AS runs,
+                       SUM(CASE WHEN i.property IS NULL THEN r.detected
+                                ELSE EXISTS (SELECT 1 FROM falsified f
+                                             WHERE f.run_id = r.id AND f.property = i.property)
+                           END) AS detected
+                FROM fuzz_runs r JOIN injections i ON i.file = r.file
+                {where}
+                GROUP BY {column} ORDER BY {column}
+            """, params).fetchall()
+        return [{'key': row['key'], 'runs': row['runs'], 'detected': row['detected'],
+                 'rate': row['detected'] / row['runs'] * 100 if row['runs'] else 0.0}
+                for row in rows]
+
+    def run_telemetry(self, campaign_id: int) -> List[Dict]:
+        """Telemetry of every run of a campaign that reached echidna, in submission order"""
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT r.file, r.status, r.wall_time, {', '.join('t.' + k for k in TELEMETRY_FIELDS)},
+                       (SELECT MIN(p.seconds) FROM property_times p WHERE p.run_id = r.id) AS first_falsified
+                FROM fuzz_runs r JOIN telemetry t ON t.run_id = r.id
+                WHERE r.campaign_id = ?
+                ORDER BY r.position, r.id
+            """, (campaign_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def telemetry_table(self, campaign_id: Optional[int] = None) -> List[Dict]:
+        """
+        Per-campaign throughput: tests/s is total tests over total fuzzing
+        time (what one fleet slot delivers), the rest are per-run averages
+        """
+        where = "WHERE r.campaign_id = ?" if campaign_id is not None else ""
+        params = (campaign_id,) if campaign_id is not None else ()
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT r.campaign_id AS campaign, c.name AS name, COUNT(*) AS runs,
+                       SUM(t.tests) AS tests, SUM(t.fuzz_time) AS fuzz_time,
+                       SUM(t.tests) / NULLIF(SUM(t.fuzz_time), 0) AS tests_per_s,
+                       AVG(t.compile_time) AS compile_time, AVG(t.startup_time) AS startup_time,
+                       AVG(t.coverage) AS coverage, MAX(t.corpus) AS corpus,
+                       (SELECT AVG(p.seconds) FROM property_times p JOIN fuzz_runs r2 ON r2.id = p.run_id
+                        WHERE r2.campaign_id = r.campaign_id) AS falsify_time
+                FROM fuzz_runs r JOIN telemetry t ON t.run_id = r.id
+                JOIN campaigns c ON c.id = r.campaign_id
+                {where}
+                GROUP BY r.campaign_id ORDER BY r.campaign_id
+            """, params).fetchall()
+        return [dict(row) for row in rows]
+
+    # --------------------------------------------------------------- exports
+
+    def export_csv(self, campaign_id: int, csv_path: str, fieldnames: List[str]):
+        with open(csv_path, 'w', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            for result in self.campaign_results(campaign_id):
+                writer.writerow(result)
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the SQLite results store")
+    parser.add_argument("db", help="Path to results.db")
+    parser.add_argument("--by", choices=sorted(GROUP_COLUMNS), default="bug")
+    parser.add_argument("--campaign", type=int, default=None, help="Limit to one campaign id")
+    parser.add_argument("--telemetry", action="store_true",
+                        help="Per-campaign throughput/coverage table instead of detection rates")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    if args.telemetry:
+        print(f"{'campaign':<30} {'runs':>6} {'tests':>12} {'tests/s':>10} {'compile':>9} "
+              f"{'startup':>9} {'cov':>8} {'corpus':>7}")
+        for row in store.telemetry_table(args.campaign):
+            label = f"{row['campaign']}:{row['name']}"
+            print(f"{label:<30} {row['runs']:>6} {row['tests'] or 0:>12} {row['tests_per_s'] or 0:>10.0f} "
+                  f"{row['compile_time'] or 0:>8.2f}s {row['startup_time'] or 0:>8.2f}s "
+                  f"{row['coverage'] or 0:>8.0f} {row['corpus'] or 0:>7}")
+        return
+
+    print(f"{args.by:<40} {'runs':>8} {'detected':>10} {'rate':>8}")
+    for row in store.detection_rate(args.by, args.campaign):
+        print(f"{str(row['key']):<40} {row['runs']:>8} {row['detected']:>10} {row['rate']:>7.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -10,30 +10,290 @@ import subprocess
 import json
 import time
 import csv
+import asyncio
+import threading
+import contextvars
+import hashlib
+import fnmatch
+import socket
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+
+from compile_cache import CompileCache, DEFAULT_CACHE_DIR, source_digest
+from async_exec import (stream_process, kill_process_group, run_async, track_process, untrack_process,
+                        interrupted, interrupt_guard)
+from sol_index import SolIndex
+from results_store import ResultsStore, DEFAULT_DB_NAME
+from runtime_history import RuntimeHistory, makespan
+from dedup import normalize, translate
+from corpus_seed import balance_functions, load_sequences, seed_corpus, cap_corpus
+from job_queue import JobQueue, LeaseKeeper, DEFAULT_LEASE
+from seed_stats import SEED_BATCH, DEFAULT_CONFIDENCE, DEFAULT_THRESHOLD, z_score, aggregate_seeds
+import profiling
+from profiling import span
+
+JOURNAL_FILE = "results.jsonl"
+
+# Queue mode: seconds between claim attempts while other workers hold the
+# remaining jobs (their leases may still expire and become claimable)
+QUEUE_POLL = 5
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Echidna config per profile (next to run.py):
+#   default -> echidna.yaml (shrinking + coverage reports)
+#   detect  -> echidna-detect.yaml (no shrinking / reports, max tests per second)
+#   repro   -> echidna.yaml + --stop-on-fail, re-run of DETECTED contracts
+PROFILE_CONFIGS = {
+    'default': 'echidna.yaml',
+    'detect': 'echidna-detect.yaml',
+    'repro': 'echidna.yaml',
+}
+REPRO_DIR = "repro"
+# Baseline runs of the original (un-injected) contracts: their verdict screens
+# the variants and their corpus seeds them
+BASE_CORPUS_DIR = "corpus-base"
+
+def profile_config(profile: str) -> Optional[str]:
+    path = os.path.join(HERE, PROFILE_CONFIGS[profile])
+    return path if os.path.exists(path) else None
+
+# `solcArgs: "--optimize"` in an echidna config (one key: no YAML dependency)
+SOLC_ARGS_PATTERN = re.compile(r'^\s*solcArgs\s*:\s*["\']?([^"\'#\n]*)', re.MULTILINE)
+
+def config_solc_args(config: Optional[str]) -> str:
+    """solcArgs of an echidna config ('' when unset); --precompiled exports are built with them"""
+    if not config or not os.path.exists(config):
+        return ""
+    with open(config, 'r') as f:
+        match = SOLC_ARGS_PATTERN.search(f.read())
+    return match.group(1).strip() if match else ""
+
+# Lines of echidna output kept in memory per run (full log lives on disk)
+OUTPUT_TAIL_LINES = 40
+
+# Length cap of the one-line 'error' reason persisted with ERROR results
+ERROR_MAX_CHARS = 200
+
+def error_line(text: str, last: bool = False) -> str:
+    """First (or last) non-empty line of an error text, capped: the result's 'error' field"""
+    lines = [line.strip() for line in str(text).splitlines() if line.strip()]
+    if not lines:
+        return ''
+    return (lines[-1] if last else lines[0])[:ERROR_MAX_CHARS]
+
+# "[Worker 0] Test echidna_x falsified!" (live) / "echidna_x: failed!" (final report)
+FALSIFIED_PATTERN = re.compile(r'(echidna_\w+)(?::\s*failed|\s+falsified)', re.IGNORECASE)
+
+# "Seed: 1234" printed by echidna at the end of a campaign
+SEED_PATTERN = re.compile(r'Seed:\s*(-?\d+)')
+
+# Telemetry from echidna's progress output:
+#   "Compiling `X.sol`... Done! (1.23s)"
+#   "[status] tests: 0/3, fuzzing: 12000/50000, values: [], cov: 1234, corpus: 5, gas/s: 987654"
+#   final report: "Total calls: N", "Unique instructions: N", "Corpus size: N"
+COMPILE_PATTERN = re.compile(r'Compiling .*?Done! \((\d+(?:\.\d+)?)s\)')
+STATUS_PATTERN = re.compile(r'\[status\] tests: \d+/\d+, fuzzing: (\d+)/\d+.*?cov: (\d+), corpus: (\d+)')
+GAS_PATTERN = re.compile(r'gas/s: (\d+)')
+FINAL_PATTERNS = {
+    'tests': re.compile(r'Total calls:\s*(\d+)'),
+    'coverage': re.compile(r'Unique instructions:\s*(\d+)'),
+    'corpus': re.compile(r'Corpus size:\s*(\d+)'),
+}
+# Per-run time series next to the log: <file>.telemetry.jsonl
+TELEMETRY_SUFFIX = ".telemetry.jsonl"
+
+CSV_FIELDS = ['file', 'contract', 'status', 'detected', 'time']
+
+# Extra columns of multi-seed mode (seed_stats.aggregate_seeds)
+SEED_FIELDS = ['seeds', 'seeds_detected', 'detection_probability', 'p_low', 'p_high',
+               'confident', 'ttd_median', 'ttd_p10', 'ttd_p90']
+
+# Echidna --test-limit for single-budget runs
+DEFAULT_TEST_LIMIT = 1000000
+
+# Adaptive mode: (test limit, timeout seconds) per tier, cheapest first.
+# Only UNDETECTED / TIMEOUT contracts are escalated to the next tier.
+DEFAULT_TIERS = [(50000, 30), (250000, 60), (1000000, 120)]
+
+def parse_tiers(spec: str) -> List[Tuple[int, int]]:
+    """'50000:30,250000:60' -> [(50000, 30), (250000, 60)]"""
+    tiers = []
+    for item in spec.split(','):
+        test_limit, timeout = item.split(':')
+        tiers.append((int(test_limit), int(timeout)))
+    return tiers
 
 class EchidnaRunner:
-    def __init__(self, contracts_dir: str, output_dir: str = "echidna-results"):
+    def __init__(self, contracts_dir: str, output_dir: str = "echidna-results",
+                 timeout: int = 120, workers: Optional[int] = None,
+                 cache: Optional[CompileCache] = None, config: Optional[str] = None,
+                 resume: bool = False, force: Optional[List[str]] = None,
+                 stop_on_detect: Optional[str] = None,
+                 store: Optional[ResultsStore] = None, test_limit: int = DEFAULT_TEST_LIMIT,
+                 tiers: Optional[List[Tuple[int, int]]] = None,
+                 total_budget: Optional[float] = None, precompiled: bool = False,
+                 profile: str = 'default', dedup: bool = False,
+                 source_dir: Optional[str] = None, seed_corpus: bool = False,
+                 baseline: Optional[str] = None, seeds: Optional[int] = None,
+                 confidence: float = DEFAULT_CONFIDENCE, threshold: float = DEFAULT_THRESHOLD):
         self.contracts_dir = contracts_dir
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
         
+        self.timeout = timeout
+        self.test_limit = test_limit
+        
+        # Adaptive budget: escalate through tiers until the campaign has used
+        # total_budget seconds of wall clock (None = single budget / no cap)
+        self.tiers = tiers
+        self.total_budget = total_budget
+        # Worker count for parallel mode (default: all CPUs)
+        self.workers = workers or os.cpu_count() or 1
+        
+        # Compile outcomes from verify-contracts.py (shared cache)
+        self.cache = cache
+        # Compile each contract once (crytic-compile export in the cache) and
+        # start echidna from that artifact on every run
+        self.precompiled = precompiled and cache is not None
+        
+        # Echidna --config file (its content is part of the job key): an
+        # explicit file, else the profile's yaml
+        self.profile = 'custom' if config else profile
+        self.config = config or profile_config(profile)
+        self.solc_args = config_solc_args(self.config)
+        
+        # Early termination on first falsification:
+        #   None     -> run until echidna exits on its own
+        #   'shrink' -> echidna --stop-on-fail (shrinks, then exits)
+        #   'kill'   -> kill echidna as soon as a property is falsified
+        self.stop_on_detect = stop_on_detect
+        
+        # Resumable campaigns: every finished result is appended to the journal
+        self.resume = resume
+        self.force = force or []
+        self.journal_path = os.path.join(output_dir, JOURNAL_FILE)
+        self._journal_lock = threading.Lock()
+        self._done = {}
+        
+        # Every finished run is appended to the SQLite store; the CSV/JSON
+        # summaries are exports of this campaign's rows
+        self.store = store or ResultsStore(os.path.join(output_dir, DEFAULT_DB_NAME))
+        self.campaign_id = None
+        # Queue workers store nothing (runs or runtimes): the queue holds their
+        # results and merge_queue records them as ONE campaign. Workers on other
+        # hosts may share this file, and the store's WAL mode needs shared memory
+        self._queue_worker = False
+        
+        # Past wall times -> longest-expected-first ordering and a predicted duration
+        self.history = RuntimeHistory(self.store)
+        self.predicted_duration = 0.0
+        self.actual_duration = None
+        self.repro_summary = None
+        
+        # Fuzz one representative per semantic equivalence class (dedup.py)
+        # and copy its verdict to the other members
+        self.dedup = dedup
+        self._normalized = {}   # path -> (normalized hash, canonical -> original name)
+        
+        # Original contracts of the variants (default: contracts_dir). Each is
+        # fuzzed once (baseline); its deposit sequences can seed the variants'
+        # corpora and a failing baseline flags ('flag') or skips ('skip')
+        # every variant of that source
+        self.source_dir = source_dir or contracts_dir
+        self.seed_corpus = seed_corpus
+        self.baseline = baseline
+        self._base_failed = {}   # variant file -> falsified properties of its base
+        self._main_contracts = {}
+        
+        # Multi-seed mode: up to `seeds` runs per contract (--seed 1..N), in
+        # rounds of SEED_BATCH, until the Wilson interval of the detection
+        # probability at `confidence` excludes `threshold`
+        self.seeds = seeds
+        self.confidence = confidence
+        self.threshold = threshold
+        
         self.results = []
+        
+        # Per-job output buffer so parallel jobs don't interleave lines
+        # (a context variable works for both worker threads and asyncio tasks)
+        self._print_lock = threading.Lock()
+        self._out = contextvars.ContextVar('echidna_output', default=None)
+    
+    def _say(self, msg: str = ""):
+        """Print now, or buffer if running inside a parallel worker"""
+        buffer = self._out.get()
+        if buffer is not None:
+            buffer.append(msg)
+        else:
+            print(msg)
+    
+    def _detect_main_contract(self, contract_path: str) -> str:
+        # SolIndex skips comments/interfaces/libraries and prefers the _Inj_ contract
+        key = (contract_path, os.path.getmtime(contract_path))
+        if key not in self._main_contracts:
+            with open(contract_path, 'r') as f:
+                main = SolIndex(f.read()).main_contract()
+            self._main_contracts[key] = main['name'] if main else \
+                os.path.basename(contract_path).replace('.sol', '')
+        return self._main_contracts[key]
     
-    def run_echidna(self, contract_path: str, timeout: int = 120) -> Dict:
+    def _detect_properties(self, contract_path: str) -> List[str]:
+        """Injected echidna_detect_* properties (several in packed variants)"""
+        with open(contract_path, 'r') as f:
+            return re.findall(r'function\s+(echidna_detect_\w+)', f.read())
+    
+    def _echidna_args(self, main_contract: str, test_limit: Optional[int] = None,
+                      seed: Optional[int] = None) -> List[str]:
+        """Echidna arguments that influence the verdict (paths excluded)"""
+        args = [
+            '--contract', main_contract,
+            '--format', 'text',  # Changed from json to text for better error visibility
+            '--test-mode', 'property',  # Changed to property mode for echidna_ functions
+            '--test-limit', str(test_limit or self.test_limit)  # Number of test cases
+        ]
+        if self.config:
+            args += ['--config', self.config]
+        if self.stop_on_detect == 'shrink':
+            args += ['--stop-on-fail']
+        if seed is not None:
+            args += ['--seed', str(seed)]
+        return args
+    
+    def job_key(self, contract_path: str, timeout: Optional[int] = None,
+                test_limit: Optional[int] = None, seed: Optional[int] = None) -> str:
         """
-        Run Echidna on single contract
+        Identity of a fuzz job: source hash + echidna args + config content +
+        timeout + whether echidna starts from a precompiled export
+        """
+        main_contract = self._detect_main_contract(contract_path)
+        config_text = ""
+        if self.config and os.path.exists(self.config):
+            with open(self.config, 'r') as f:
+                config_text = f.read()
+        material = json.dumps([
+            source_digest(contract_path),
+            self._echidna_args(main_contract, test_limit, seed),
+            config_text,
+            timeout if timeout is not None else self.timeout,
+            self.stop_on_detect,
+            self.precompiled
+        ])
+        return hashlib.sha256(material.encode()).hexdigest()
+    
+    def _prepare(self, contract_path: str, test_limit: Optional[int] = None,
+                 seed: Optional[int] = None):
+        """
+        Initial result + echidna command; cmd is None when the result is
+        already final (known compile failure)
         """
         contract_name = os.path.basename(contract_path)
-        print(f"\n[Testing] {contract_name}")
+        self._say(f"\n[Testing] {contract_name}" + (f" (seed {seed})" if seed is not None else ""))
         
         # Extract contract name from file
-        with open(contract_path, 'r') as f:
-            content = f.read()
-            # Find main contract name
-            match = re.search(r'contract\s+(\w+)', content)
-            main_contract = match.group(1) if match else contract_name.replace('.sol', '')
+        main_contract = self._detect_main_contract(contract_path)
         
         result = {
             'file': contract_name,
@@ -41,119 +301,996 @@ class EchidnaRunner:
             'status': 'UNKNOWN',
             'detected': False,
             'time': 0,
-            'output': ''
+            'log_file': os.path.join(self.output_dir, f"{contract_name}.txt"),
+            'profile': self.profile,
+            'output_tail': ''
+        }
+        corpus_dir = self._corpus_dir(main_contract)
+        if seed is not None:
+            # Seeds of one contract run side by side: own log, and an own
+            # corpus so every seed is an independent sample
+            result['seed'] = seed
+            result['log_file'] = os.path.join(self.output_dir, f"{contract_name}.seed{seed}.txt")
+            corpus_dir = os.path.join(corpus_dir, f"seed{seed}")
+        
+        # Known compile failure -> don't spend an echidna startup rediscovering it
+        cached = self.cache.find_outcome(contract_path) if self.cache is not None else None
+        if cached is not None and not cached['success']:
+            result['status'] = 'ERROR'
+            result['output_tail'] = f"Compilation failed (cached): {cached['message']}"
+            result['error'] = error_line(result['output_tail'])
+            result['log_file'] = None
+            self._say(f"  ⚠ ERROR - {result['output_tail']}")
+            return result, None
+        
+        target = contract_path
+        if self.precompiled:
+            try:
+                with span('compile', file=contract_name):
+                    artifact, message = self.cache.artifact(contract_path, solc_args=self.solc_args)
+            except OSError as e:
+                artifact, message = contract_path, None
+                self._say(f"  [WARN] crytic-compile unavailable ({e}) - echidna compiles the source")
+            if artifact is None:
+                result['status'] = 'ERROR'
+                result['output_tail'] = f"Compilation failed: {message}"
+                result['error'] = error_line(result['output_tail'])
+                result['log_file'] = None
+                self._say(f"  ⚠ ERROR - {result['output_tail']}")
+                return result, None
+            target = artifact
+        
+        cmd = ['echidna', target] + self._echidna_args(main_contract, test_limit, seed) + [
+            '--corpus-dir', corpus_dir
+        ]
+        return result, cmd
+    
+    def _corpus_dir(self, main_contract: str) -> str:
+        return f'{self.output_dir}/corpus_{main_contract}'
+    
+    def _new_stream(self, contract_path: str, log, start_time: float) -> Dict:
+        """Parser state for one streamed echidna run"""
+        return {
+            'log': log,
+            'start_time': start_time,
+            # Full output goes straight to the per-contract log; only a bounded
+            # tail and the parsed flags stay in memory
+            'tail': deque(maxlen=OUTPUT_TAIL_LINES),
+            'detect_time': None,
+            'saw_passing': False,
+            'falsified': set(),
+            # kill mode waits until every injected property has been broken
+            'injected': set(self._detect_properties(contract_path)),
+            'pending_props': set(self._detect_properties(contract_path)),
+            'seed': None,
+            # Telemetry: status samples + events, first falsification per property
+            'series': [],
+            'compile_time': None,
+            'final': {},
+            'prop_times': {},
+        }
+    
+    def _consume(self, state: Dict, line: str) -> bool:
+        """Handle one output line; True = stop echidna now"""
+        state['log'].write(line)
+        state['tail'].append(line)
+        line_lower = line.lower()
+        if 'passed' in line_lower or 'passing' in line_lower:
+            state['saw_passing'] = True
+        seed = SEED_PATTERN.search(line)
+        if seed:
+            state['seed'] = int(seed.group(1))
+        elapsed = time.time() - state['start_time']
+        self._telemetry_line(state, line, elapsed)
+        for match in FALSIFIED_PATTERN.finditer(line):
+            prop = match.group(1)
+            state['falsified'].add(prop)
+            if prop not in state['prop_times']:
+                state['prop_times'][prop] = elapsed
+                state['series'].append({'t': elapsed, 'event': 'falsified', 'property': prop})
+            # Only the injected echidna_detect_* properties count as a detection
+            # (any property when the file has none, e.g. a baseline run)
+            if prop in state['injected'] or not state['injected']:
+                state['pending_props'].discard(prop)
+                if state['detect_time'] is None:
+                    state['detect_time'] = time.time() - state['start_time']
+        return (state['detect_time'] is not None and self.stop_on_detect == 'kill'
+                and not state['pending_props'])
+    
+    def _telemetry_line(self, state: Dict, line: str, elapsed: float):
+        """Status line -> time-series sample; compile / final report lines -> totals"""
+        status = STATUS_PATTERN.search(line) if '[status]' in line else None
+        if status:
+            tests, coverage, corpus = (int(g) for g in status.groups())
+            sample = {'t': elapsed, 'tests': tests, 'coverage': coverage, 'corpus': corpus}
+            gas = GAS_PATTERN.search(line)
+            if gas:
+                sample['gas_per_s'] = int(gas.group(1))
+            previous = next((s for s in reversed(state['series']) if 'tests' in s), None)
+            if previous is not None and elapsed > previous['t']:
+                sample['tests_per_s'] = (tests - previous['tests']) / (elapsed - previous['t'])
+            state['series'].append(sample)
+            return
+        if state['compile_time'] is None:
+            compiled = COMPILE_PATTERN.search(line)
+            if compiled:
+                state['compile_time'] = float(compiled.group(1))
+                state['series'].append({'t': elapsed, 'event': 'compiled',
+                                        'seconds': state['compile_time']})
+                return
+        for key, pattern in FINAL_PATTERNS.items():
+            match = pattern.search(line)
+            if match:
+                state['final'][key] = int(match.group(1))
+    
+    def _telemetry(self, result: Dict, state: Dict) -> Dict:
+        """
+        Run totals: startup = until the first status line (compile, analysis,
+        deployment); tests/s over the fuzzing phase only
+        """
+        wall_time = time.time() - state['start_time']
+        samples = [s for s in state['series'] if 'tests' in s]
+        last = samples[-1] if samples else {}
+        startup = samples[0]['t'] if samples else None
+        fuzz_time = wall_time - startup if startup is not None else None
+        tests = state['final'].get('tests', last.get('tests'))
+        
+        tests_per_s = None
+        if len(samples) >= 2 and samples[-1]['t'] > samples[0]['t']:
+            tests_per_s = (samples[-1]['tests'] - samples[0]['tests']) / (samples[-1]['t'] - samples[0]['t'])
+        elif tests is not None and fuzz_time:
+            tests_per_s = tests / fuzz_time
+        
+        series_path = None
+        if result.get('log_file'):
+            series_path = re.sub(r'\.txt$', '', result['log_file']) + TELEMETRY_SUFFIX
+            with open(series_path, 'w') as f:
+                for entry in state['series']:
+                    f.write(json.dumps(entry) + "\n")
+        return {
+            'compile_time': state['compile_time'],
+            'startup_time': startup,
+            'fuzz_time': fuzz_time,
+            'tests': tests,
+            'tests_per_s': tests_per_s,
+            'coverage': state['final'].get('coverage', last.get('coverage')),
+            'corpus': state['final'].get('corpus', last.get('corpus')),
+            'gas_per_s': last.get('gas_per_s'),
+            'property_times': dict(state['prop_times']),
+            'series': series_path,
         }
+    
+    def _classify(self, result: Dict, state: Dict):
+        detect_time = state['detect_time']
+        result['wall_time'] = time.time() - state['start_time']
+        # Reported time is time-to-detection for DETECTED runs
+        result['time'] = detect_time if detect_time is not None else result['wall_time']
+        
+        # Parse hasil
+        if detect_time is not None:
+            result['status'] = 'DETECTED'
+            result['detected'] = True
+            self._say(f"  ✓ DETECTED - Echidna found reentrancy vulnerability! ({detect_time:.1f}s)")
+        # [FIX] Terima 'passing' atau 'passed' sebagai tanda undetected
+        elif state['saw_passing']:
+            result['status'] = 'UNDETECTED'
+            self._say(f"  ✗ UNDETECTED - Bug not found")
+        else:
+            result['status'] = 'ERROR'
+            result['error'] = error_line(''.join(state['tail']), last=True) or "No verdict in echidna output"
+            self._say(f"  ⚠ ERROR - Check output")
+    
+    def _finish_stream(self, result: Dict, state: Dict):
+        with span('parse', file=result['file'], profile=True):
+            result['output_tail'] = ''.join(state['tail'])
+            result['falsified'] = sorted(state['falsified'])
+            if state['seed'] is not None:
+                result['seed'] = state['seed']
+            result['telemetry'] = self._telemetry(result, state)
+    
+    def _timeout(self, result: Dict, timeout: int, start_time: float):
+        result['status'] = 'TIMEOUT'
+        result['time'] = timeout
+        # Observed runtime (incl. the kill) -> timed-out jobs reach the runtime history too
+        result['wall_time'] = time.time() - start_time
+        self._say(f"  ⏱ TIMEOUT after {timeout}s")
+    
+    def _error(self, result: Dict, error: Exception, start_time: float):
+        result['status'] = 'ERROR'
+        result['time'] = time.time() - start_time
+        result['output_tail'] = str(error)
+        result['error'] = error_line(error) or type(error).__name__
+        self._say(f"  ✗ ERROR: {error}")
+    
+    def run_echidna(self, contract_path: str, timeout: Optional[int] = None,
+                    test_limit: Optional[int] = None, seed: Optional[int] = None) -> Dict:
+        """
+        Run Echidna on single contract
+        """
+        if timeout is None:
+            timeout = self.timeout
+        with span('prepare', file=os.path.basename(contract_path), profile=True):
+            result, cmd = self._prepare(contract_path, test_limit, seed)
+        if cmd is None:
+            return result
         
         start_time = time.time()
+        state = None
         
         try:
-            # Run Echidna
-            cmd = [
-                'echidna',
-                contract_path,
-                '--contract', main_contract,
-                '--format', 'text',  # Changed from json to text for better error visibility
-                '--test-mode', 'property',  # Changed to property mode for echidna_ functions
-                '--corpus-dir', f'{self.output_dir}/corpus_{main_contract}',
-                '--test-limit', '1000000'  # Number of test cases
-            ]
-            
-            process = subprocess.run(
+            # Stream stdout line by line so DETECTED is known the moment a
+            # property breaks, not when echidna finally exits.
+            # Own session -> a timeout kills echidna AND its solc children.
+            process = subprocess.Popen(
                 cmd,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True,
-                timeout=timeout
+                bufsize=1,
+                start_new_session=True
             )
+            track_process(process)
+            timed_out = threading.Event()
             
-            result['time'] = time.time() - start_time
-            result['output'] = process.stdout + process.stderr
+            def _on_timeout():
+                timed_out.set()
+                kill_process_group(process)
             
-            # Parse hasil
-            if 'falsified' in process.stdout.lower():
-                result['status'] = 'DETECTED'
-                result['detected'] = True
-                print(f"  ✓ DETECTED - Echidna found reentrancy vulnerability!")
-            # [FIX] Terima 'passing' atau 'passed' sebagai tanda undetected
-            elif 'passed' in process.stdout.lower() or 'passing' in process.stdout.lower():
-                result['status'] = 'UNDETECTED'
-                print(f"  ✗ UNDETECTED - Bug not found")
-            else:
-                result['status'] = 'ERROR'
-                print(f"  ⚠ ERROR - Check output")
+            watchdog = threading.Timer(timeout, _on_timeout)
+            watchdog.start()
             
-            # Save detailed output
-            output_file = os.path.join(
-                self.output_dir, 
-                f"{contract_name}.txt"
-            )
-            with open(output_file, 'w') as f:
-                f.write(result['output'])
+            try:
+                with open(result['log_file'], 'w') as log:
+                    state = self._new_stream(contract_path, log, start_time)
+                    for line in process.stdout:
+                        if self._consume(state, line):
+                            kill_process_group(process)
+                            break
+                process.wait()
+            finally:
+                watchdog.cancel()
+                kill_process_group(process)
+                untrack_process(process)
+                process.stdout.close()
+                if state is not None:
+                    self._finish_stream(result, state)
+            
+            if timed_out.is_set() and state['detect_time'] is None:
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            
+            self._classify(result, state)
             
         except subprocess.TimeoutExpired:
-            result['status'] = 'TIMEOUT'
-            result['time'] = timeout
-            print(f"  ⏱ TIMEOUT after {timeout}s")
+            self._timeout(result, timeout, start_time)
         
         except Exception as e:
-            result['status'] = 'ERROR'
-            result['time'] = time.time() - start_time
-            result['output'] = str(e)
-            print(f"  ✗ ERROR: {e}")
+            self._error(result, e, start_time)
         
         return result
     
-    def run_all(self) -> List[Dict]:
+    async def run_echidna_async(self, contract_path: str, timeout: Optional[int] = None,
+                                test_limit: Optional[int] = None, seed: Optional[int] = None) -> Dict:
+        """
+        run_echidna on the asyncio backend (async_exec.stream_process)
+        """
+        if timeout is None:
+            timeout = self.timeout
+        with span('prepare', file=os.path.basename(contract_path), profile=True):
+            result, cmd = self._prepare(contract_path, test_limit, seed)
+        if cmd is None:
+            return result
+        
+        start_time = time.time()
+        state = None
+        
+        try:
+            with open(result['log_file'], 'w') as log:
+                state = self._new_stream(contract_path, log, start_time)
+                _, timed_out = await stream_process(cmd, timeout, lambda line: self._consume(state, line))
+            
+            if timed_out and state['detect_time'] is None:
+                self._timeout(result, timeout, start_time)
+            else:
+                self._classify(result, state)
+        
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._error(result, e, start_time)
+        
+        finally:
+            if state is not None:
+                self._finish_stream(result, state)
+        
+        return result
+    
+    def _load_journal(self) -> Dict[str, Dict]:
+        """Results already on disk, keyed by job key (last entry wins)"""
+        done = {}
+        if not os.path.exists(self.journal_path):
+            return done
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line from a crash
+                done[entry['key']] = entry['result']
+        return done
+    
+    @staticmethod
+    def _record(result: Dict) -> Dict:
+        """Result as persisted: parsed fields + log file reference, no output"""
+        return {k: v for k, v in result.items() if k != 'output_tail'}
+    
+    def _append_journal(self, key: str, result: Dict):
+        with self._journal_lock:
+            with open(self.journal_path, 'a') as f:
+                f.write(json.dumps({'key': key, 'result': self._record(result)}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def _is_forced(self, contract_name: str) -> bool:
+        return any(fnmatch.fnmatch(contract_name, pattern) for pattern in self.force)
+    
+    def _journaled(self, contract_path: str, timeout: Optional[int] = None,
+                   test_limit: Optional[int] = None, seed: Optional[int] = None):
+        """(job key, previous verdict or None) for resume mode"""
+        key = self.job_key(contract_path, timeout, test_limit, seed)
+        contract_name = os.path.basename(contract_path)
+        
+        # ERROR is not a verdict (echidna missing, crytic-compile hiccup, ...): retried on resume
+        if key in self._done and self._done[key]['status'] != 'ERROR' and not self._is_forced(contract_name):
+            self._say(f"\n[Skip] {contract_name} - already tested ({self._done[key]['status']})")
+            return key, self._done[key]
+        return key, None
+    
+    def record(self, result: Dict, position: Optional[int] = None):
+        """Append a finished (or reused) result to this campaign in the store"""
+        if self._queue_worker:
+            return
+        if result['file'] in self._base_failed:
+            result['base_failed'] = True
+        self.store.add_fuzz_run(self.campaign_id, result, position)
+    
+    def _limits(self, budget: Optional[Dict]):
+        """
+        (timeout, test_limit) for one run; None when the campaign budget is
+        used up (tiers after the first are cut at the budget deadline)
+        """
+        if budget is None:
+            return self.timeout, self.test_limit
+        timeout = budget['timeout']
+        if budget.get('deadline') is not None:
+            timeout = min(timeout, int(budget['deadline'] - time.time()))
+            if timeout <= 0:
+                return None
+        return timeout, budget['test_limit']
+    
+    def _record_runtime(self, contract_path: str, result: Dict, timeout: int, test_limit: int):
+        if self._queue_worker:
+            return  # merge_queue records it: one writer for a store hosts may share
+        if 'wall_time' in result:  # Cached compile failures never started echidna
+            self.history.record(contract_path, test_limit, timeout, result['wall_time'])
+    
+    def _execute(self, contract_path: str, position: Optional[int] = None,
+                 budget: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Run one contract, or reuse its journaled result when resuming.
+        Tier and seed runs (budget given) are recorded by their scheduler.
+        """
+        limits = self._limits(budget)
+        if limits is None:
+            return None
+        timeout, test_limit = limits
+        seed = budget.get('seed') if budget else None
+        
+        key, result = self._journaled(contract_path, timeout, test_limit, seed)
+        if result is None:
+            with span('fuzz', file=os.path.basename(contract_path), seed=seed) as trace:
+                result = self.run_echidna(contract_path, timeout, test_limit, seed)
+                trace['status'] = result['status']
+            if interrupted():
+                return result  # Killed by Ctrl-C: not a verdict, keep it out of the journal/history
+            self._append_journal(key, result)
+            self._record_runtime(contract_path, result, timeout, test_limit)
+        if budget is None:
+            self.record(result, position)
+        return result
+    
+    async def _execute_async(self, contract_path: str, position: Optional[int] = None,
+                             budget: Optional[Dict] = None) -> Optional[Dict]:
+        limits = self._limits(budget)
+        if limits is None:
+            return None
+        timeout, test_limit = limits
+        seed = budget.get('seed') if budget else None
+        
+        key, result = self._journaled(contract_path, timeout, test_limit, seed)
+        if result is None:
+            with span('fuzz', file=os.path.basename(contract_path), seed=seed) as trace:
+                result = await self.run_echidna_async(contract_path, timeout, test_limit, seed)
+                trace['status'] = result['status']
+            self._append_journal(key, result)
+            self._record_runtime(contract_path, result, timeout, test_limit)
+        if budget is None:
+            self.record(result, position)
+        return result
+    
+    def prepare_journal(self):
+        """
+        Load the journal when resuming, otherwise start a fresh one;
+        either way the runs are recorded under a new campaign in the store
+        (queue workers: by merge_queue)
+        """
+        if not self._queue_worker:
+            self.campaign_id = self.store.start_campaign(os.path.basename(os.path.abspath(self.contracts_dir)),
+                                                         self.output_dir)
+        if self.resume:
+            self._done = self._load_journal()
+            print(f"[INFO] Resuming: {len(self._done)} results in {self.journal_path}")
+        else:
+            self._done = {}
+            open(self.journal_path, 'w').close()  # Fresh campaign
+    
+    def _flush(self, lines: List[str]):
+        with self._print_lock:
+            print("\n".join(lines), flush=True)
+    
+    def run_job(self, contract_path: str, position: Optional[int] = None,
+                budget: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Worker entry point: run one contract and print its block atomically
+        """
+        lines = []
+        token = self._out.set(lines)
+        try:
+            return self._execute(contract_path, position, budget)
+        finally:
+            self._out.reset(token)
+            self._flush(lines)
+    
+    async def run_job_async(self, contract_path: str, limit: asyncio.Semaphore,
+                            position: Optional[int] = None,
+                            budget: Optional[Dict] = None) -> Optional[Dict]:
+        """asyncio counterpart of run_job; at most `limit` echidna processes at once"""
+        async with limit:
+            lines = []
+            token = self._out.set(lines)
+            try:
+                return await self._execute_async(contract_path, position, budget)
+            finally:
+                self._out.reset(token)
+                self._flush(lines)
+    
+    async def _run_all_async(self, jobs: List[Tuple[int, str]],
+                             budget: Optional[Dict] = None) -> List[Optional[Dict]]:
+        limit = asyncio.Semaphore(self.workers)
+        # gather() keeps submission order -> same summary as a sequential run
+        return await asyncio.gather(*(self.run_job_async(p, limit, i, budget) for i, p in jobs))
+    
+    def _normalize(self, contract_path: str):
+        if contract_path not in self._normalized:
+            with open(contract_path, 'r', encoding='utf-8') as f:
+                stream, names = normalize(f.read())
+            digest = hashlib.sha256('\x00'.join(stream).encode()).hexdigest()
+            self._normalized[contract_path] = (digest, names)
+        return self._normalized[contract_path]
+    
+    def _dedup(self, jobs: List[Tuple[int, str]]):
+        """(jobs to run, representative position -> all (position, path) of its class)"""
+        reps = {}
+        classes = {}
+        for position, path in jobs:
+            try:
+                digest = self._normalize(path)[0]
+            except (OSError, ValueError):
+                digest = path  # Unreadable: its own class, echidna reports the error
+            rep = reps.setdefault(digest, position)
+            classes.setdefault(rep, []).append((position, path))
+        
+        duplicates = len(jobs) - len(classes)
+        if duplicates:
+            print(f"[Dedup] {len(jobs)} contracts -> {len(classes)} equivalence classes "
+                  f"({duplicates} verdicts copied)")
+        return [job for job in jobs if job[0] in classes], classes
+    
+    def _copy_verdict(self, result: Dict, rep_path: str, contract_path: str) -> Dict:
+        """Representative's verdict for another class member, names translated"""
+        rep_names = self._normalize(rep_path)[1]
+        names = self._normalize(contract_path)[1]
+        copy = dict(result)
+        copy['file'] = os.path.basename(contract_path)
+        copy['contract'] = translate([result['contract']], rep_names, names)[0]
+        if 'falsified' in result:
+            copy['falsified'] = sorted(translate(result['falsified'], rep_names, names))
+        copy['dedup_of'] = result['file']
+        copy.pop('telemetry', None)  # Not a run of its own
+        return copy
+    
+    def _dispatch(self, jobs: List[Tuple[int, str]], parallel: bool, backend: str,
+                  budget: Optional[Dict] = None) -> List[Optional[Dict]]:
+        """Run (position, path) jobs on the selected backend, results in job order"""
+        all_jobs = jobs
+        classes = None
+        if self.dedup:
+            jobs, classes = self._dedup(jobs)
+        
+        limits = (budget['timeout'], budget['test_limit']) if budget else (self.timeout, self.test_limit)
+        ordered, expected = self.history.order(jobs, limits[1], limits[0])
+        workers = self.workers if parallel else 1
+        if workers == 1:
+            ordered = jobs  # Order only matters when jobs share a pool
+        predicted = makespan([expected[i] for i, _ in ordered], workers)
+        self.predicted_duration += predicted
+        print(f"[INFO] Predicted duration: {predicted:.1f}s for {len(jobs)} contracts")
+        
+        if parallel and backend == "asyncio":
+            results = run_async(self._run_all_async(ordered, budget))
+        elif parallel and len(jobs) > 1:
+            # echidna is a subprocess, so threads are enough to keep every core busy.
+            # Longest-expected jobs are submitted first so none starts last and
+            # stretches the campaign
+            with ThreadPoolExecutor(max_workers=self.workers) as pool, interrupt_guard(pool):
+                results = list(pool.map(self.run_job, [p for _, p in ordered], [i for i, _ in ordered],
+                                        [budget] * len(ordered)))
+        else:
+            results = [self._execute(p, i, budget) for i, p in ordered]
+        
+        by_position = dict(zip([i for i, _ in ordered], results))
+        
+        for members in (classes or {}).values():
+            (rep_position, rep_path), others = members[0], members[1:]
+            for position, path in others:
+                rep_result = by_position[rep_position]
+                copy = self._copy_verdict(rep_result, rep_path, path) if rep_result is not None else None
+                by_position[position] = copy
+                if copy is not None and budget is None:
+                    self.record(copy, position)
+        
+        # Back to glob order -> summary identical to a sequential run
+        return [by_position[i] for i, _ in all_jobs]
+    
+    def _run_tiered(self, jobs: List[Tuple[int, str]], parallel: bool, backend: str) -> List[Dict]:
+        """
+        Adaptive budget: every contract runs at tier 1, only UNDETECTED/TIMEOUT
+        ones move up. A result is recorded as soon as a tier decides it; the
+        'tier' field says which one did.
+        """
+        start = time.time()
+        deadline = start + self.total_budget if self.total_budget else None
+        final = {}
+        pending = jobs
+        
+        for tier_no, (test_limit, timeout) in enumerate(self.tiers, 1):
+            if not pending:
+                break
+            if tier_no > 1 and deadline is not None and time.time() >= deadline:
+                print(f"\n[INFO] Total budget of {self.total_budget:g}s used up, "
+                      f"{len(pending)} contracts keep their tier {tier_no - 1} verdict")
+                break
+            print(f"\n[Tier {tier_no}/{len(self.tiers)}] {len(pending)} contracts, "
+                  f"test-limit {test_limit}, timeout {timeout}s")
+            
+            budget = {
+                'tier': tier_no,
+                'test_limit': test_limit,
+                'timeout': timeout,
+                # Tier 1 always completes so every contract has a verdict
+                'deadline': deadline if tier_no > 1 else None
+            }
+            with span(f'tier {tier_no}', cat='stage', contracts=len(pending)):
+                tier_results = self._dispatch(pending, parallel, backend, budget)
+            escalate = []
+            for (position, path), result in zip(pending, tier_results):
+                if result is None:
+                    continue  # Cut by the budget: previous tier's verdict stands
+                result['tier'] = tier_no
+                final[position] = result
+                if result['status'] in ('UNDETECTED', 'TIMEOUT') and tier_no < len(self.tiers):
+                    escalate.append((position, path))
+                else:
+                    self.record(result, position)
+            
+            decided = len(pending) - len(escalate)
+            print(f"[Tier {tier_no}] decided {decided}, escalating {len(escalate)} "
+                  f"({time.time() - start:.1f}s elapsed)")
+            pending = escalate
+        
+        # Escalation stopped by the budget
+        for position, _ in pending:
+            self.record(final[position], position)
+        
+        return [final[position] for position, _ in jobs]
+    
+    async def _run_budgets_async(self, batch: List[Tuple[str, Dict]]) -> List[Optional[Dict]]:
+        limit = asyncio.Semaphore(self.workers)
+        return await asyncio.gather(*(self.run_job_async(p, limit, None, b) for p, b in batch))
+    
+    def _run_seeded(self, jobs: List[Tuple[int, str]], parallel: bool, backend: str) -> List[Dict]:
+        """
+        Multi-seed mode: each round starts the next SEED_BATCH seeds of every
+        undecided contract (all seed runs of a round share the worker pool).
+        A contract is decided once its Wilson interval excludes the
+        threshold, or after `seeds` runs.
+        """
+        z = z_score(self.confidence)
+        runs = {position: [] for position, _ in jobs}
+        final = {}
+        pending = jobs
+        round_no = 0
+        
+        while pending:
+            round_no += 1
+            batch = []
+            for position, path in pending:
+                done = len(runs[position])
+                for seed in range(done + 1, min(done + SEED_BATCH, self.seeds) + 1):
+                    batch.append((position, path, {'test_limit': self.test_limit,
+                                                   'timeout': self.timeout, 'seed': seed}))
+            print(f"\n[Seeds] Round {round_no}: {len(pending)} contracts, {len(batch)} runs")
+            
+            with span(f'seed round {round_no}', cat='stage', runs=len(batch)):
+                if parallel and backend == "asyncio":
+                    results = run_async(self._run_budgets_async([(p, b) for _, p, b in batch]))
+                elif parallel and len(batch) > 1:
+                    with ThreadPoolExecutor(max_workers=self.workers) as pool, interrupt_guard(pool):
+                        results = list(pool.map(self.run_job, [p for _, p, _ in batch], [None] * len(batch),
+                                                [b for _, _, b in batch]))
+                else:
+                    results = [self._execute(p, None, b) for _, p, b in batch]
+            for (position, _, _), result in zip(batch, results):
+                runs[position].append(result)
+            
+            undecided = []
+            for position, path in pending:
+                result = aggregate_seeds(runs[position], z, self.threshold)
+                final[position] = result
+                if not result['confident'] and len(runs[position]) < self.seeds:
+                    undecided.append((position, path))
+                    continue
+                self.record(result, position)
+                print(f"  [Seeds] {result['file']}: {result['seeds_detected']}/{result['seeds']} seeds "
+                      f"detected, p={result['detection_probability']:.2f} "
+                      f"[{result['p_low']:.2f}, {result['p_high']:.2f}] -> {result['status']}")
+            print(f"[Seeds] Round {round_no}: decided {len(pending) - len(undecided)}, "
+                  f"{len(undecided)} need more seeds")
+            pending = undecided
+        
+        return [final[position] for position, _ in jobs]
+    
+    def run_repro(self, parallel: bool = False, backend: str = "threads") -> List[Dict]:
+        """
+        Repro pass: re-run only DETECTED contracts with shrinking on
+        (echidna.yaml + --stop-on-fail) for minimal call sequences.
+        Its verdicts are a separate campaign with profile 'repro',
+        summarized in <output-dir>/repro/.
+        """
+        jobs = [(i, os.path.join(self.contracts_dir, r['file']))
+                for i, r in enumerate(self.results) if r['detected']]
+        if not jobs:
+            return []
+        
+        repro = EchidnaRunner(self.contracts_dir, os.path.join(self.output_dir, REPRO_DIR),
+                              timeout=self.timeout, workers=self.workers, cache=self.cache,
+                              resume=self.resume, force=self.force, stop_on_detect='shrink',
+                              store=self.store, test_limit=self.test_limit,
+                              precompiled=self.precompiled, profile='repro', dedup=self.dedup)
+        print(f"\n[Repro] Re-running {len(jobs)} detected contracts with shrinking ({repro.config})")
+        repro.prepare_journal()
+        repro.results = repro._dispatch(jobs, parallel, backend)
+        
+        repro.store.export_csv(repro.campaign_id, os.path.join(repro.output_dir, "detection_results.csv"),
+                               CSV_FIELDS + ['profile'])
+        
+        reproduced = sum(1 for r in repro.results if r['detected'])
+        print(f"[Repro] {reproduced}/{len(jobs)} reproduced, minimal sequences in {repro.output_dir}")
+        self.repro_summary = {
+            'campaign': repro.campaign_id,
+            'contracts': len(jobs),
+            'reproduced': reproduced,
+            'output_dir': repro.output_dir
+        }
+        return repro.results
+    
+    def _variant_sources(self, jobs: List[Tuple[int, str]]) -> Dict[str, List[str]]:
+        """source contract path -> its variant paths among the jobs (via injection logs)"""
+        job_paths = {os.path.basename(p): p for _, p in jobs}
+        variants = {}
+        for log_path in sorted(Path(self.contracts_dir).glob("*_injection_log.json")):
+            with open(log_path, 'r') as f:
+                entries = json.load(f)
+            for entry in entries:
+                source = entry.get('source', log_path.name[:-len("_injection_log.json")])
+                source_path = os.path.join(self.source_dir, f"{source}.sol")
+                if entry['file'] in job_paths and os.path.exists(source_path):
+                    members = variants.setdefault(source_path, [])
+                    if job_paths[entry['file']] not in members:
+                        members.append(job_paths[entry['file']])
+        return variants
+    
+    def run_baseline(self, variants: Dict[str, List[str]], parallel: bool = False,
+                     backend: str = "threads"):
+        """
+        Fuzz each original contract once. The journal in corpus-base/ is
+        resumed, so a source whose hash was already fuzzed is not run again.
+        Returns (baseline runner, source path -> baseline result)
+        """
+        base = EchidnaRunner(self.source_dir, os.path.join(self.output_dir, BASE_CORPUS_DIR),
+                             timeout=self.timeout, workers=self.workers, cache=self.cache,
+                             config=self.config if self.profile == 'custom' else None,
+                             resume=True, store=self.store, test_limit=self.test_limit,
+                             precompiled=self.precompiled,
+                             profile='default' if self.profile in ('custom', 'repro') else self.profile)
+        base_jobs = list(enumerate(variants))
+        print(f"\n[Baseline] Fuzzing {len(base_jobs)} source contracts")
+        base.prepare_journal()
+        results = base._dispatch(base_jobs, parallel, backend)
+        return base, dict(zip(variants, results))
+    
+    def seed_corpora(self, base: 'EchidnaRunner', variants: Dict[str, List[str]]):
+        """
+        Copy the baseline corpus sequences that reach balance-mutating
+        functions into every variant's corpus
+        """
+        for source_path, members in variants.items():
+            base_corpus = base._corpus_dir(base._detect_main_contract(source_path))
+            cap_corpus(base_corpus)
+            sequences = load_sequences(base_corpus, balance_functions(source_path))
+            added = 0
+            for path in members:
+                corpus = self._corpus_dir(self._detect_main_contract(path))
+                # Multi-seed runs read corpus_<name>/seed<N> (see _prepare): seed each of them
+                corpora = [os.path.join(corpus, f"seed{n}") for n in range(1, self.seeds + 1)] \
+                    if self.seeds else [corpus]
+                for target in corpora:
+                    added += seed_corpus(target, sequences)
+                    cap_corpus(target)
+            print(f"[Seed] {os.path.basename(source_path)}: {len(sequences)} deposit sequences, "
+                  f"{added} files seeded into {len(members)} variant corpora"
+                  + (f" x {self.seeds} seeds" if self.seeds else ""))
+    
+    def screen_variants(self, variants: Dict[str, List[str]], base_results: Dict[str, Dict]):
+        """Remember variants whose un-injected source already fails a property"""
+        for source_path, members in variants.items():
+            base_result = base_results.get(source_path)
+            if base_result is None or not base_result.get('falsified'):
+                continue
+            print(f"[Baseline] {os.path.basename(source_path)} already fails "
+                  f"{', '.join(base_result['falsified'])} -> {len(members)} variants "
+                  f"{'skipped' if self.baseline == 'skip' else 'flagged'}")
+            for path in members:
+                self._base_failed[os.path.basename(path)] = base_result['falsified']
+    
+    def _base_failed_result(self, contract_path: str) -> Dict:
+        contract_name = os.path.basename(contract_path)
+        return {
+            'file': contract_name,
+            'contract': self._detect_main_contract(contract_path),
+            'status': 'BASE_FAILED',
+            'detected': False,
+            'time': 0,
+            'log_file': None,
+            'profile': self.profile,
+            'base_falsified': self._base_failed[contract_name]
+        }
+    
+    def run_all(self, parallel: bool = False, backend: str = "threads",
+                repro: bool = False) -> List[Dict]:
         """
         Run Echidna on all contracts in directory
         """
         sol_files = list(Path(self.contracts_dir).glob("*.sol"))
         
         print(f"[INFO] Found {len(sol_files)} contracts to test")
+        
+        self.prepare_journal()
         print("=" * 60)
         
-        for sol_file in sol_files:
-            result = self.run_echidna(str(sol_file))
-            self.results.append(result)
+        if parallel and backend == "asyncio":
+            print(f"[INFO] Parallel mode (asyncio): {self.workers} concurrent echidna processes")
+        elif parallel and len(sol_files) > 1:
+            print(f"[INFO] Parallel mode: {self.workers} workers")
+        
+        jobs = list(enumerate(str(f) for f in sol_files))
+        start = time.time()
+        if self.seed_corpus or self.baseline:
+            variants = self._variant_sources(jobs)
+            if variants:
+                with span('baseline stage', cat='stage', sources=len(variants)):
+                    base, base_results = self.run_baseline(variants, parallel, backend)
+                if self.seed_corpus:
+                    with span('seed corpora', cat='stage'):
+                        self.seed_corpora(base, variants)
+                if self.baseline:
+                    self.screen_variants(variants, base_results)
+            else:
+                print(f"[Baseline] No source contracts for the variants found in {self.source_dir}")
+            print("=" * 60)
+        
+        # Skipped variants get their BASE_FAILED verdict without a fuzz run
+        skipped = {}
+        if self.baseline == 'skip':
+            for position, path in jobs:
+                if os.path.basename(path) in self._base_failed:
+                    skipped[position] = self._base_failed_result(path)
+                    self.record(skipped[position], position)
+        to_run = [job for job in jobs if job[0] not in skipped]
+        
+        with span('fuzz stage', cat='stage', contracts=len(to_run)):
+            if self.tiers:
+                results = self._run_tiered(to_run, parallel, backend)
+            elif self.seeds:
+                results = self._run_seeded(to_run, parallel, backend)
+            else:
+                results = self._dispatch(to_run, parallel, backend)
+        by_position = dict(zip([i for i, _ in to_run], results))
+        by_position.update(skipped)
+        self.results.extend(by_position[i] for i, _ in jobs)
+        self.actual_duration = time.time() - start
+        
+        if repro:
+            with span('repro stage', cat='stage'):
+                self.run_repro(parallel, backend)
         
         # Generate summary
-        self._generate_summary()
+        with span('summary', cat='stage'):
+            self._generate_summary()
+        
+        return self.results
+    
+    def _work(self, queue: JobQueue, owner: str, lease: float) -> int:
+        """One queue slot: claim, run under a renewed lease, complete; until the queue is done"""
+        done = 0
+        while not interrupted():
+            job = queue.claim(owner, lease)
+            if job is None:
+                if queue.unfinished() == 0:
+                    return done
+                time.sleep(min(lease / 3, QUEUE_POLL))
+                continue
+            if job['attempt'] > 1:
+                print(f"[Queue] {owner} reclaimed {job['file']} (attempt {job['attempt']})")
+            with LeaseKeeper(queue, job['file'], owner, lease):
+                result = self.run_job(os.path.join(self.contracts_dir, job['file']), job['position'])
+            if interrupted():
+                break  # Killed by Ctrl-C, not a verdict: the lease expires and someone reruns it
+            queue.complete(job['file'], owner, self._record(result))
+            done += 1
+        return done
+    
+    def run_worker(self, queue_path: str, worker_id: str, lease: float = DEFAULT_LEASE,
+                   parallel: bool = False, repro: bool = False) -> List[Dict]:
+        """
+        Queue mode: any number of workers (hosts sharing the contracts dir and
+        the queue file) enqueue the same contracts and claim them one by one.
+        The worker that sees the queue finished writes the merged summary.
+        """
+        sol_files = list(Path(self.contracts_dir).glob("*.sol"))
+        queue = JobQueue(queue_path)
+        
+        # First worker to enqueue fixes positions (= its glob order) and
+        # priorities (expected runtime -> longest jobs are claimed first)
+        priorities = []
+        for f in sol_files:
+            try:
+                priorities.append(self.history.predict(str(f), self.test_limit, self.timeout)[0])
+            except OSError:
+                priorities.append(0.0)
+        queue.enqueue([(i, f.name, prio) for i, (f, prio) in enumerate(zip(sol_files, priorities))])
+        
+        # Workers may share the output dir: one journal per worker
+        safe_id = re.sub(r'[^\w.-]', '_', worker_id)
+        self.journal_path = os.path.join(self.output_dir, f"results.{safe_id}.jsonl")
+        self._queue_worker = True
+        self.prepare_journal()
+        slots = self.workers if parallel else 1
+        counts = queue.counts()
+        print(f"[Queue] Worker {worker_id}: {slots} slots, {len(sol_files)} contracts "
+              f"({counts.get('done', 0)} done, {counts.get('leased', 0)} leased) in {queue_path}")
+        print("=" * 60)
+        
+        start = time.time()
+        owners = [worker_id] if slots == 1 else [f"{worker_id}/{n}" for n in range(slots)]
+        with span('fuzz stage', cat='stage', worker=worker_id), ThreadPoolExecutor(max_workers=slots) as pool, \
+                interrupt_guard(pool):
+            done = sum(pool.map(lambda owner: self._work(queue, owner, lease), owners))
+        print(f"\n[Queue] Worker {worker_id} ran {done} contracts in {time.time() - start:.1f}s")
+        
+        if not queue.claim_merge():
+            print("[Queue] Summary is written by the worker that finished the queue")
+            return []
+        self.predicted_duration = makespan(sorted(priorities, reverse=True), slots)
+        self.actual_duration = time.time() - start
+        return self.merge_queue(queue, parallel, repro)
+    
+    def merge_queue(self, queue: JobQueue, parallel: bool = False, repro: bool = False) -> List[Dict]:
+        """All queue results, in position order, as one campaign + the usual summaries"""
+        self._queue_worker = False
+        self.campaign_id = self.store.start_campaign(os.path.basename(os.path.abspath(self.contracts_dir)),
+                                                     self.output_dir)
+        results = queue.results()
+        for position, result in results:
+            self.record(result, position)
+            try:
+                self._record_runtime(os.path.join(self.contracts_dir, result['file']), result,
+                                     self.timeout, self.test_limit)
+            except OSError:
+                pass  # Contract gone since it ran: no history entry
+        self.results = [result for _, result in results]
+        print(f"[Queue] Merged {len(results)} results (campaign {self.campaign_id})")
         
+        if repro:
+            with span('repro stage', cat='stage'):
+                self.run_repro(parallel)
+        with span('summary', cat='stage'):
+            self._generate_summary()
         return self.results
     
     def _generate_summary(self):
         """
-        Generate summary CSV and statistics
+        Generate summary CSV and statistics (exported from the results store)
         """
+        results = self.store.campaign_results(self.campaign_id)
+        
         # Save CSV
         csv_path = os.path.join(self.output_dir, "detection_results.csv")
-        
-        with open(csv_path, 'w', newline='') as csvfile:
-            fieldnames = ['file', 'contract', 'status', 'detected', 'time']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            for result in self.results:
-                writer.writerow({k: result[k] for k in fieldnames})
+        fieldnames = CSV_FIELDS + (['tier'] if self.tiers else []) + \
+            (SEED_FIELDS if self.seeds else []) + \
+            (['profile'] if self.profile != 'default' else [])
+        self.store.export_csv(self.campaign_id, csv_path, fieldnames)
         
         print("\n" + "=" * 60)
         print("DETECTION SUMMARY")
         print("=" * 60)
         
         # Statistics
-        total = len(self.results)
-        detected = sum(1 for r in self.results if r['detected'])
-        undetected = sum(1 for r in self.results if r['status'] == 'UNDETECTED')
-        errors = sum(1 for r in self.results if r['status'] == 'ERROR')
-        timeouts = sum(1 for r in self.results if r['status'] == 'TIMEOUT')
+        total = len(results)
+        detected = sum(1 for r in results if r['detected'])
+        undetected = sum(1 for r in results if r['status'] == 'UNDETECTED')
+        errors = sum(1 for r in results if r['status'] == 'ERROR')
+        timeouts = sum(1 for r in results if r['status'] == 'TIMEOUT')
+        base_skipped = sum(1 for r in results if r['status'] == 'BASE_FAILED')
+        base_flagged = sum(1 for r in results if r.get('base_failed'))
         
-        detection_rate = (detected / total * 100) if total > 0 else 0
+        # Variants skipped because their source already fails are not a verdict
+        judged = total - base_skipped
+        detection_rate = (detected / judged * 100) if judged > 0 else 0
         
         print(f"Total Contracts:    {total}")
         print(f"✓ Detected:         {detected} ({detection_rate:.1f}%)")
         print(f"✗ Undetected:       {undetected}")
         print(f"⚠ Errors:           {errors}")
         print(f"⏱ Timeouts:         {timeouts}")
+        if self.baseline:
+            print(f"⚑ Base failed:      {base_flagged} "
+                  f"({'skipped' if self.baseline == 'skip' else 'flagged, still fuzzed'})")
+        if self.seeds:
+            seed_runs = sum(r.get('seeds', 0) for r in results)
+            uncertain = sum(1 for r in results if r.get('confident') is False)
+            print(f"Seed runs:          {seed_runs} (max {self.seeds}/contract, "
+                  f"{uncertain} contracts below {self.confidence:.0%} confidence)")
+        if self.tiers:
+            for tier_no in range(1, len(self.tiers) + 1):
+                decided = sum(1 for r in results if r.get('tier') == tier_no)
+                print(f"Tier {tier_no} decided:    {decided}")
         print(f"\nDetection Rate:     {detection_rate:.2f}%")
+        if self.actual_duration is not None:
+            print(f"Duration:           {self.actual_duration:.1f}s (predicted {self.predicted_duration:.1f}s)")
+        
+        telemetry = self.store.telemetry_table(self.campaign_id)
+        telemetry = telemetry[0] if telemetry else None
+        telemetry_path = os.path.join(self.output_dir, "telemetry.csv")
+        runs = self.store.run_telemetry(self.campaign_id)
+        if runs:
+            with open(telemetry_path, 'w', newline='') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=list(runs[0].keys()))
+                writer.writeheader()
+                writer.writerows(runs)
+        if telemetry:
+            print(f"Throughput:         {telemetry['tests_per_s'] or 0:.0f} tests/s "
+                  f"({telemetry['tests'] or 0} tests in {telemetry['fuzz_time'] or 0:.1f}s of fuzzing), "
+                  f"compile {telemetry['compile_time'] or 0:.2f}s / startup {telemetry['startup_time'] or 0:.2f}s avg")
         print(f"\nResults saved to:   {csv_path}")
         
         # Save JSON summary
@@ -165,22 +1302,129 @@ class EchidnaRunner:
                 'undetected': undetected,
                 'errors': errors,
                 'timeouts': timeouts,
+                'base_failed': base_flagged,
                 'detection_rate': detection_rate,
-                'results': self.results
+                'campaign': self.campaign_id,
+                'predicted_duration': self.predicted_duration,
+                'actual_duration': self.actual_duration,
+                'profile': self.profile,
+                'repro': self.repro_summary,
+                'seeds': {
+                    'max_per_contract': self.seeds,
+                    'confidence': self.confidence,
+                    'threshold': self.threshold
+                } if self.seeds else None,
+                'telemetry': telemetry,
+                'results': results
             }, f, indent=2)
         
         print(f"Summary JSON:       {summary_path}")
+        if runs:
+            print(f"Telemetry:          {telemetry_path} (time series: *{TELEMETRY_SUFFIX})")
+        print(f"Results DB:         {self.store.db_path} (campaign {self.campaign_id})")
+        
+        self._generate_variant_summary()
+    
+    def _import_injection_logs(self):
+        """bug-injector.py logs in the contracts dir -> injections table"""
+        for log_path in sorted(Path(self.contracts_dir).glob("*_injection_log.json")):
+            with open(log_path, 'r') as f:
+                entries = json.load(f)
+            self.store.add_injections(entries, log_path.name[:-len("_injection_log.json")])
+    
+    def _generate_variant_summary(self):
+        """
+        Per-variant attribution: each falsified echidna_detect_* property is
+        mapped back to its variant, so packed files report every variant separately
+        """
+        self._import_injection_logs()
+        rows = self.store.variant_results(self.campaign_id)
+        if not rows:
+            return
+        
+        csv_path = os.path.join(self.output_dir, "variant_results.csv")
+        with open(csv_path, 'w', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+        
+        detected = sum(1 for r in rows if r['detected'])
+        print(f"Variants:           {detected}/{len(rows)} detected "
+              f"({detected / len(rows) * 100:.1f}%) -> {csv_path}")
 
 
 def main():
     import sys
-    import re
+    import argparse
     
-    if len(sys.argv) < 2:
-        print("Usage: python run_echidna_tests.py <injected_contracts_dir>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Echidna Reentrancy Detection Test Suite")
+    parser.add_argument("contracts_dir", help="Directory with injected contracts")
+    parser.add_argument("--output-dir", default="echidna-results", help="Results directory")
+    parser.add_argument("--timeout", type=int, default=120, help="Per-contract timeout in seconds")
+    parser.add_argument("--parallel", action="store_true", help="Run contracts in a worker pool")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Worker count for --parallel (default: number of CPUs)")
+    parser.add_argument("--backend", choices=["threads", "asyncio"], default="threads",
+                        help="Execution backend for --parallel")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Compile cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached compile outcomes")
+    parser.add_argument("--config", default=None,
+                        help="Echidna config file passed via --config (overrides --profile)")
+    parser.add_argument("--profile", choices=["default", "detect"], default="default",
+                        help="default: echidna.yaml, detect: echidna-detect.yaml (no shrinking)")
+    parser.add_argument("--repro", action="store_true",
+                        help="Afterwards re-run DETECTED contracts with shrinking for minimal sequences")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip contracts already tested with the same source/args/config")
+    parser.add_argument("--force", nargs="+", default=[], metavar="PATTERN",
+                        help="With --resume, re-run contracts matching these filename globs")
+    parser.add_argument("--test-limit", type=int, default=DEFAULT_TEST_LIMIT,
+                        help="Echidna --test-limit (single-budget mode)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Escalate undetected/timed-out contracts through budget tiers "
+                             f"(default tiers: {','.join(f'{l}:{t}' for l, t in DEFAULT_TIERS)})")
+    parser.add_argument("--tiers", type=parse_tiers, default=None, metavar="LIMIT:SECONDS,...",
+                        help="Custom budget tiers (implies --adaptive)")
+    parser.add_argument("--total-budget", type=float, default=None, metavar="SECONDS",
+                        help="Wall-clock cap for the whole adaptive campaign")
+    parser.add_argument("--precompiled", action="store_true",
+                        help="Compile each contract once with crytic-compile and fuzz from the cached export")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Fuzz one contract per semantic equivalence class, copy its verdict to the rest")
+    parser.add_argument("--source-dir", default=None,
+                        help="Original contracts of the variants for --seed-corpus/--baseline "
+                             "(default: contracts_dir)")
+    parser.add_argument("--seed-corpus", action="store_true",
+                        help="Fuzz the original contracts once and seed every variant's corpus "
+                             "with their deposit sequences")
+    parser.add_argument("--baseline", choices=["flag", "skip"], default=None,
+                        help="Fuzz the original contracts once (cached by source hash); flag or skip "
+                             "variants whose original already fails a property")
+    parser.add_argument("--seeds", type=int, default=None, metavar="N",
+                        help="Multi-seed mode: up to N echidna seeds per contract, stopping early "
+                             "once the detection verdict reaches --confidence")
+    parser.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE,
+                        help="Wilson interval confidence for --seeds early stopping")
+    parser.add_argument("--detect-threshold", type=float, default=DEFAULT_THRESHOLD, metavar="P",
+                        help="Detection probability at or above which a contract counts as DETECTED")
+    parser.add_argument("--queue", default=None, metavar="QUEUE_DB",
+                        help="Work-queue mode: claim contracts from this shared SQLite queue "
+                             "(start one worker per host, same path on a shared filesystem)")
+    parser.add_argument("--worker-id", default=None,
+                        help="Lease owner name in queue mode (default: <hostname>-<pid>)")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE, metavar="SECONDS",
+                        help="Queue lease length; jobs of a worker silent for this long are reclaimed")
+    parser.add_argument("--merge", action="store_true",
+                        help="With --queue, only write the merged summary of a finished queue")
+    profiling.add_arguments(parser)
+    parser.add_argument("--db", default=None,
+                        help=f"SQLite results store (default: <output-dir>/{DEFAULT_DB_NAME})")
+    parser.add_argument("--stop-on-detect", choices=["shrink", "kill"], default=None,
+                        help="End the run at the first falsified property "
+                             "(shrink: let echidna shrink first, kill: stop immediately)")
+    args = parser.parse_args()
     
-    contracts_dir = sys.argv[1]
+    contracts_dir = args.contracts_dir
     
     if not os.path.exists(contracts_dir):
         print(f"[ERROR] Directory not found: {contracts_dir}")
@@ -190,8 +1434,44 @@ def main():
     print("Echidna Reentrancy Detection Test Suite")
     print("=" * 60)
     
-    runner = EchidnaRunner(contracts_dir)
-    runner.run_all()
+    if args.queue and (args.adaptive or args.tiers or args.dedup or args.seed_corpus or args.baseline):
+        parser.error("--queue runs single-budget jobs; drop --adaptive/--tiers/--dedup/--seed-corpus/--baseline")
+    if args.seeds and (args.adaptive or args.tiers or args.dedup or args.queue):
+        parser.error("--seeds runs its own rounds; drop --adaptive/--tiers/--dedup/--queue")
+    if args.merge and not args.queue:
+        parser.error("--merge needs --queue")
+    
+    if args.precompiled and args.no_cache:
+        parser.error("--precompiled stores its artifacts in the compile cache; drop --no-cache")
+    
+    profiling.from_args(args, "run.py")
+    cache = None if args.no_cache else CompileCache(args.cache_dir)
+    runner = EchidnaRunner(contracts_dir, args.output_dir,
+                           timeout=args.timeout, workers=args.workers, cache=cache,
+                           config=args.config, resume=args.resume, force=args.force,
+                           stop_on_detect=args.stop_on_detect,
+                           store=ResultsStore(args.db) if args.db else None,
+                           test_limit=args.test_limit,
+                           tiers=args.tiers or (DEFAULT_TIERS if args.adaptive else None),
+                           total_budget=args.total_budget, precompiled=args.precompiled,
+                           profile=args.profile, dedup=args.dedup,
+                           source_dir=args.source_dir, seed_corpus=args.seed_corpus,
+                           baseline=args.baseline, seeds=args.seeds,
+                           confidence=args.confidence, threshold=args.detect_threshold)
+    try:
+        if args.merge:
+            queue = JobQueue(args.queue)
+            if queue.unfinished():
+                print(f"[ERROR] Queue not finished: {queue.counts()}")
+                sys.exit(1)
+            runner.merge_queue(queue, parallel=args.parallel, repro=args.repro)
+        elif args.queue:
+            runner.run_worker(args.queue, args.worker_id or f"{socket.gethostname()}-{os.getpid()}",
+                              lease=args.lease, parallel=args.parallel, repro=args.repro)
+        else:
+            runner.run_all(parallel=args.parallel, backend=args.backend, repro=args.repro)
+    except KeyboardInterrupt:
+        sys.exit(130)
 
 
 if __name__ == "__main__":
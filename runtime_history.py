@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Runtime History & Job Ordering
+Remembers how long every echidna run took (by source hash, then by variant
+file name) and orders jobs longest-expected-first so one slow contract does
+not start last and stretch a parallel campaign. Contracts never seen before
+get an estimate from their size/complexity.
+"""
+
+import os
+import heapq
+import statistics
+from typing import List, Dict, Optional, Tuple
+
+from compile_cache import source_digest
+from results_store import ResultsStore
+from sol_index import SolIndex
+
+# Seconds per complexity unit before any history exists (only the order matters then)
+DEFAULT_RATE = 0.01
+
+def complexity_units(contract_path: str) -> float:
+    """
+    Size/complexity of a contract: significant tokens (comments dropped)
+    plus a weight per function, since echidna explores every callable
+    """
+    with open(contract_path, 'r', encoding='utf-8') as f:
+        index = SolIndex(f.read())
+    return len(index.tokens) / 100 + len(index.functions) + len(index.mutations)
+
+def makespan(durations: List[float], workers: int) -> float:
+    """Campaign length when jobs start in this order on `workers` slots"""
+    slots = [0.0] * max(1, min(workers, len(durations)))
+    for duration in durations:
+        heapq.heapreplace(slots, slots[0] + duration)
+    return max(slots) if durations else 0.0
+
+class RuntimeHistory:
+    def __init__(self, store: ResultsStore):
+        self.store = store
+        self._rate = None
+
+    def _unit_rate(self) -> float:
+        if self._rate is None:
+            rates = self.store.runtime_rates()
+            self._rate = statistics.median(rates) if rates else DEFAULT_RATE
+        return self._rate
+
+    def predict(self, contract_path: str, test_limit: Optional[int] = None,
+                timeout: Optional[float] = None) -> Tuple[float, str]:
+        """(expected seconds, basis) - basis is 'source', 'variant' or 'estimate'"""
+        expected = self.store.mean_runtime('digest', source_digest(contract_path), test_limit)
+        basis = 'source'
+        if expected is None:
+            expected = self.store.mean_runtime('file', os.path.basename(contract_path), test_limit)
+            basis = 'variant'
+        if expected is None:
+            expected = complexity_units(contract_path) * self._unit_rate()
+            basis = 'estimate'
+        if timeout is not None:
+            expected = min(expected, timeout)
+        return expected, basis
+
+    def record(self, contract_path: str, test_limit: Optional[int], timeout: Optional[float],
+               wall_time: float):
+        self.store.add_runtime(source_digest(contract_path), os.path.basename(contract_path),
+                               test_limit, timeout, complexity_units(contract_path), wall_time)
+
+    def order(self, jobs: List[Tuple[int, str]], test_limit: Optional[int] = None,
+              timeout: Optional[float] = None) -> Tuple[List[Tuple[int, str]], Dict[int, float]]:
+        """Jobs sorted longest-expected-first + expected seconds per position"""
+        expected = {}
+        for position, path in jobs:
+            try:
+                expected[position] = self.predict(path, test_limit, timeout)[0]
+            except OSError:
+                expected[position] = 0.0
+        ordered = sorted(jobs, key=lambda job: expected[job[0]], reverse=True)
+        return ordered, expected
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Multi-Seed Statistics
+One echidna run is one sample: whether a bug is found within the budget
+depends on the seed. Several seeds per contract give a detection
+probability with a Wilson score interval; seeding stops early once that
+interval lies entirely above or below the detection threshold.
+"""
+
+import math
+import statistics
+from typing import List, Dict, Optional, Tuple
+
+# Seeds started per contract per round (4 all-equal outcomes already
+# decide a 95% interval against a 0.5 threshold)
+SEED_BATCH = 4
+
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_THRESHOLD = 0.5
+
+def z_score(confidence: float) -> float:
+    """Two-sided normal quantile, e.g. 0.95 -> 1.96"""
+    return statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+
+def wilson_interval(successes: int, trials: int, z: float) -> Tuple[float, float]:
+    """Wilson score interval of a binomial proportion (well-behaved at 0/n and n/n)"""
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denom = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denom
+    half = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linear-interpolated q-th percentile (0..100); None for no values"""
+    if not values:
+        return None
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+def merge_telemetry(runs: List[Dict]) -> Optional[Dict]:
+    """Telemetry of all seed runs as one: totals summed, rates over the totals"""
+    telemetry = [r['telemetry'] for r in runs if r.get('telemetry')]
+    if not telemetry:
+        return None
+
+    def values(key):
+        return [t[key] for t in telemetry if t.get(key) is not None]
+
+    tests, fuzz_time = sum(values('tests')), sum(values('fuzz_time'))
+    property_times = {}
+    for t in telemetry:
+        for prop, seconds in t.get('property_times', {}).items():
+            property_times[prop] = min(seconds, property_times.get(prop, seconds))
+    return {
+        'compile_time': statistics.mean(values('compile_time')) if values('compile_time') else None,
+        'startup_time': statistics.mean(values('startup_time')) if values('startup_time') else None,
+        'fuzz_time': fuzz_time,
+        'tests': tests,
+        'tests_per_s': tests / fuzz_time if fuzz_time else None,
+        'coverage': max(values('coverage'), default=None),
+        'corpus': max(values('corpus'), default=None),
+        'gas_per_s': statistics.mean(values('gas_per_s')) if values('gas_per_s') else None,
+        'property_times': property_times,
+        'series': None,  # One file per seed run (see seed_runs)
+    }
+
+def aggregate_seeds(runs: List[Dict], z: float, threshold: float = DEFAULT_THRESHOLD) -> Dict:
+    """
+    Per-seed results of one contract -> one result. ERROR runs are not
+    samples. Time-to-detection statistics cover the detecting seeds only
+    (runs that never detected are censored at their budget).
+    """
+    valid = [r for r in runs if r['status'] != 'ERROR']
+    hits = [r for r in valid if r['detected']]
+    low, high = wilson_interval(len(hits), len(valid), z)
+    probability = len(hits) / len(valid) if valid else 0.0
+    ttd = [r['time'] for r in hits]
+
+    if not valid:
+        status = 'ERROR'
+    elif probability >= threshold:
+        status = 'DETECTED'
+    elif all(r['status'] == 'TIMEOUT' for r in valid):
+        status = 'TIMEOUT'
+    else:
+        status = 'UNDETECTED'
+
+    first = min(hits, key=lambda r: r['time']) if hits else runs[0]
+    falsified = sorted({prop for r in runs for prop in r.get('falsified', [])})
+    result = {
+        'file': first['file'],
+        'contract': first['contract'],
+        'status': status,
+        'detected': status == 'DETECTED',
+        'time': statistics.median(ttd) if ttd else statistics.median(r['time'] for r in runs),
+        # Fastest detecting run (reproducible with --seed)
+        'log_file': first.get('log_file'),
+        'seed': first.get('seed'),
+        'falsified': falsified,
+        'seeds': len(valid),
+        'seeds_detected': len(hits),
+        'detection_probability': probability,
+        'p_low': low,
+        'p_high': high,
+        'confident': not valid or low > threshold or high < threshold,
+        'ttd_median': statistics.median(ttd) if ttd else None,
+        'ttd_p10': percentile(ttd, 10),
+        'ttd_p90': percentile(ttd, 90),
+        'seed_runs': [{'seed': r.get('seed'), 'status': r['status'], 'time': r['time'],
+                       'log_file': r.get('log_file')} for r in runs],
+        'telemetry': merge_telemetry(runs),
+    }
+    if status == 'ERROR':
+        result['error'] = next((r['error'] for r in runs if r.get('error')), None)
+    return result
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Single-Pass Solidity Source Index
+Tokenizes a file once and records contract boundaries, state variables,
+mappings, functions, constructors and balance-mutation sites (byte offsets).
+Shared by instrument.py and bug-injector.py.
+"""
+
+import re
+import bisect
+from typing import List, Dict, Optional
+
+TOKEN_PATTERN = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<number>0[xX][0-9a-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:[eE]-?\d+)?)
+  | (?P<ident>[A-Za-z_$][A-Za-z0-9_$]*)
+  | (?P<op>\+=|-=|\*=|/=|%=|\|=|&=|\^=|<<=|>>=|==|!=|<=|>=|=>|&&|\|\||\+\+|--|<<|>>|\*\*|.)
+''', re.DOTALL | re.VERBOSE)
+
+CONTAINER_KEYWORDS = ('contract', 'library', 'interface')
+CALLABLE_KEYWORDS = ('function', 'constructor', 'modifier', 'fallback', 'receive')
+SKIP_TO_SEMICOLON = ('event', 'error', 'using', 'pragma', 'import', 'type')
+VAR_MODIFIERS = ('public', 'private', 'internal', 'external', 'constant', 'immutable', 'override', 'transient')
+ASSIGN_OPS = ('=', '+=', '-=')
+
+# mapping(address => uint...) like the original regexes of both tools
+BALANCE_MAPPING_VALUE = re.compile(r'u?int\d*$')
+
+def tokenize(text: str) -> List[tuple]:
+    """(kind, text, start, end) for every significant token; comments/whitespace dropped"""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind in ('ws', 'comment'):
+            continue
+        tokens.append((kind, match.group(), match.start(), match.end()))
+    return tokens
+
+class SolIndex:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+
+        self.contracts = []     # {'name', 'kind', 'start', 'body_start', 'end', ...}
+        self.state_vars = []    # {'name', 'type', 'contract', 'start', 'end', 'visibility', ...}
+        self.functions = []     # {'name', 'kind', 'contract', 'start', 'body_start', 'end'}
+        self.mutations = []     # {'target', 'op', 'value', 'start', 'end', 'function'}
+
+        self._line_starts = [0] + [m.end() for m in re.finditer(r'\n', text)]
+        self._parse()
+
+    # ------------------------------------------------------------------ parse
+
+    def _match(self, i: int, open_tok: str, close_tok: str) -> int:
+        """Index of the token closing the bracket opened at i"""
+        depth = 0
+        while i < len(self.tokens):
+            tok = self.tokens[i][1]
+            if tok == open_tok:
+                depth += 1
+            elif tok == close_tok:
+                depth -= 1
+                if depth == 0:
+                    return i
+            i += 1
+        return len(self.tokens) - 1
+
+    def _statement_end(self, i: int) -> int:
+        """Index of the ';' ending the statement starting at i (bracket-aware)"""
+        depth = 0
+        while i < len(self.tokens):
+            tok = self.tokens[i][1]
+            if tok in '([{':
+                depth += 1
+            elif tok in ')]}':
+                depth -= 1
+                if depth < 0:
+                    return i - 1
+            elif tok == ';' and depth == 0:
+                return i
+            i += 1
+        return len(self.tokens) - 1
+
+    def _parse(self):
+        self._parse_members(0, len(self.tokens), None)
+
+    def _parse_members(self, i: int, stop: int, contract: Optional[Dict]):
+        tokens = self.tokens
+        while i < stop:
+            kind, tok, start, _ = tokens[i]
+
+            if tok == 'abstract' and i + 1 < stop and tokens[i + 1][1] == 'contract':
+                i = self._parse_container(i + 1, stop, start, 'abstract contract')
+            elif tok in CONTAINER_KEYWORDS and contract is None:
+                i = self._parse_container(i, stop, start, tok)
+            elif tok in CALLABLE_KEYWORDS:
+                i = self._parse_callable(i, stop, contract)
+            elif tok in ('struct', 'enum'):
+                j = i
+                while j < stop and tokens[j][1] != '{':
+                    j += 1
+                i = self._match(j, '{', '}') + 1
+            elif tok in SKIP_TO_SEMICOLON:
+                i = self._statement_end(i) + 1
+            elif tok in (';', '}'):
+                i += 1
+            elif contract is not None:
+                i = self._parse_state_var(i, contract)
+            else:
+                i = self._statement_end(i) + 1
+
+    def _parse_container(self, i: int, stop: int, start: int, kind: str) -> int:
+        tokens = self.tokens
+        name = tokens[i + 1][1] if i + 1 < stop else ''
+        j = i
+        while j < stop and tokens[j][1] != '{':
+            j += 1
+        close = self._match(j, '{', '}')
+
+        contract = {
+            'name': name,
+            'kind': kind,
+            'start': start,
+            'name_start': tokens[i + 1][2] if i + 1 < stop else start,
+            'body_start': tokens[j][2] if j < stop else start,
+            'end': tokens[close][2],          # offset of the closing '}'
+            'state_vars': [],
+            'functions': [],
+        }
+        self.contracts.append(contract)
+        self._parse_members(j + 1, close, contract)
+        return close + 1
+
+    def _parse_callable(self, i: int, stop: int, contract: Optional[Dict]) -> int:
+        tokens = self.tokens
+        kind = tokens[i][1]
+        if kind == 'function' and i + 1 < stop and tokens[i + 1][0] == 'ident':
+            name = tokens[i + 1][1]
+        else:
+            name = kind
+
+        # Header runs until the body '{' or a ';' (abstract/interface)
+        j = i + 1
+        depth = 0
+        while j < stop:
+            tok = tokens[j][1]
+            if tok == '(':
+                depth += 1
+            elif tok == ')':
+                depth -= 1
+            elif depth == 0 and tok in ('{', ';'):
+                break
+            j += 1
+
+        func = {
+            'name': name,
+            'kind': kind,
+            'contract': contract['name'] if contract else None,
+            'start': tokens[i][2],
+            'body_start': None,
+            'end': tokens[min(j, stop - 1)][3],
+        }
+
+        if j < stop and tokens[j][1] == '{':
+            close = self._match(j, '{', '}')
+            func['body_start'] = tokens[j][2]
+            func['end'] = tokens[close][2]
+            self._scan_body(j + 1, close, func)
+            next_i = close + 1
+        else:
+            next_i = j + 1
+
+        self.functions.append(func)
+        if contract is not None:
+            contract['functions'].append(func)
+        return next_i
+
+    def _scan_body(self, i: int, stop: int, func: Dict):
+        """Record `target[...] (=|+=|-=) value;` sites inside a function body"""
+        tokens = self.tokens
+        while i < stop:
+            kind, tok, start, _ = tokens[i]
+            if kind == 'ident' and i + 1 < stop and tokens[i + 1][1] == '[' \
+                    and (i == 0 or tokens[i - 1][1] != '.'):
+                j = i + 1
+                while j < stop and tokens[j][1] == '[':
+                    j = self._match(j, '[', ']') + 1
+                if j < stop and tokens[j][1] in ASSIGN_OPS:
+                    end = self._statement_end(j)
+                    value_start = tokens[j + 1][2] if j + 1 <= end else tokens[j][3]
+                    self.mutations.append({
+                        'target': tok,
+                        'index': self.text[tokens[i + 1][3]:tokens[j - 1][2]] if j - 1 > i + 1 else '',
+                        'op': tokens[j][1],
+                        'value': self.text[value_start:tokens[end][2]].strip(),
+                        'start': start,
+                        'end': tokens[end][3],
+                        'function': func['name'],
+                        'contract': func['contract'],
+                    })
+                    i = end + 1
+                    continue
+            i += 1
+
+    def _parse_state_var(self, i: int, contract: Dict) -> int:
+        tokens = self.tokens
+        end = self._statement_end(i)
+
+        # Name = last identifier before '=' (or ';') that is not a modifier keyword
+        assign = None
+        depth = 0
+        for j in range(i, end):
+            tok = tokens[j][1]
+            if tok in '([':
+                depth += 1
+            elif tok in ')]':
+                depth -= 1
+            elif tok == '=' and depth == 0:
+                assign = j
+                break
+        decl_end = assign if assign is not None else end
+
+        name_pos = None
+        modifiers = []
+        for j in range(decl_end - 1, i - 1, -1):
+            kind, tok = tokens[j][0], tokens[j][1]
+            if kind == 'ident' and tok not in VAR_MODIFIERS:
+                name_pos = j
+                break
+            if tok in VAR_MODIFIERS:
+                modifiers.append(tok)
+        if name_pos is None or name_pos == i:
+            return end + 1
+
+        type_end = name_pos
+        while type_end > i and tokens[type_end - 1][1] in VAR_MODIFIERS:
+            type_end -= 1
+        type_text = re.sub(r'\s+', ' ', self.text[tokens[i][2]:tokens[type_end - 1][3]])
+        type_text = re.sub(r'\s*([()=>\[\]])\s*', r'\1', type_text).replace('=>', ' => ')
+
+        var = {
+            'name': tokens[name_pos][1],
+            'type': type_text,
+            'contract': contract['name'],
+            'visibility': next((m for m in modifiers if m in ('public', 'private', 'internal')), None),
+            'constant': 'constant' in modifiers or 'immutable' in modifiers,
+            'initialized': assign is not None,
+            'start': tokens[i][2],
+            'end': tokens[end][3],
+        }
+
+        mapping = re.match(r'mapping\((\w+) => (.+)\)$', type_text)
+        if mapping:
+            var['key_type'], var['value_type'] = mapping.group(1), mapping.group(2)
+
+        self.state_vars.append(var)
+        contract['state_vars'].append(var)
+        return end + 1
+
+    # ---------------------------------------------------------------- queries
+
+    def contract(self, name: str) -> Optional[Dict]:
+        return next((c for c in self.contracts if c['name'] == name), None)
+
+    def contract_at(self, offset: int) -> Optional[Dict]:
+        return next((c for c in self.contracts if c['start'] <= offset <= c['end']), None)
+
+    def balance_mappings(self, contract: Optional[str] = None) -> List[Dict]:
+        """State vars of type mapping(address => uint*/int*)"""
+        return [v for v in self.state_vars
+                if v.get('key_type') == 'address'
+                and BALANCE_MAPPING_VALUE.match(v.get('value_type', ''))
+                and (contract is None or v['contract'] == contract)]
+
+    def uint_vars(self, contract: Optional[str] = None) -> List[Dict]:
+        """Plain uint/uint256 state vars (no constants, no initializer)"""
+        return [v for v in self.state_vars
+                if v['type'] in ('uint', 'uint256')
+                and not v['constant'] and not v['initialized']
+                and (contract is None or v['contract'] == contract)]
+
+    def has_state_var(self, name: str, contract: Optional[str] = None) -> bool:
+        return any(v['name'] == name and (contract is None or v['contract'] == contract)
+                   for v in self.state_vars)
+
+    def has_function(self, name: str, contract: Optional[str] = None) -> bool:
+        return any(f['name'] == name and (contract is None or f['contract'] == contract)
+                   for f in self.functions)
+
+    def constructors(self, contract: Optional[str] = None) -> List[Dict]:
+        return [f for f in self.functions
+                if f['kind'] == 'constructor' and (contract is None or f['contract'] == contract)]
+
+    def mutations_of(self, target: str) -> List[Dict]:
+        return [m for m in self.mutations if m['target'] == target]
+
+    def main_contract(self) -> Optional[Dict]:
+        """
+        Contract the tools operate on: an injected `*_Inj_*` contract if present,
+        else the first contract declaring a balance mapping, else the first contract
+        """
+        concrete = [c for c in self.contracts if c['kind'] in ('contract', 'abstract contract')]
+        for c in concrete:
+            if '_Inj_' in c['name']:
+                return c
+        for var in self.balance_mappings():
+            c = self.contract(var['contract'])
+            if c is not None and c in concrete:
+                return c
+        if concrete:
+            return concrete[0]
+        return self.contracts[0] if self.contracts else None
+
+    # ------------------------------------------------------------------ lines
+
+    def line_of(self, offset: int) -> int:
+        """0-based line number containing offset"""
+        return bisect.bisect_right(self._line_starts, offset) - 1
+
+    def line_count(self) -> int:
+        return len(self._line_starts)
+
+    def line_start(self, line: int) -> int:
+        return self._line_starts[line]
+
+    def line_end(self, line: int) -> int:
+        """Offset just past the line's '\\n' (or end of text)"""
+        if line + 1 < len(self._line_starts):
+            return self._line_starts[line + 1]
+        return len(self.text)
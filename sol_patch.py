@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Offset-Based Edit Engine
+Collects insertions/replacements as offset patches against one base source
+and applies them in a single pass. One SourceBuffer can emit many patched
+copies (one per patch set) without re-copying the base for each variant.
+"""
+
+import io
+from typing import List, Tuple, Iterator, Union, IO
+
+class PatchSet:
+    """Insertions/replacements against character offsets of ONE base text"""
+
+    def __init__(self):
+        self.patches: List[Tuple[int, int, int, str]] = []  # (start, end, seq, text)
+
+    def insert(self, offset: int, text: str) -> 'PatchSet':
+        self.patches.append((offset, offset, len(self.patches), text))
+        return self
+
+    def replace(self, start: int, end: int, text: str) -> 'PatchSet':
+        self.patches.append((start, end, len(self.patches), text))
+        return self
+
+    def __len__(self):
+        return len(self.patches)
+
+def _merge(patch_sets) -> List[Tuple[int, int, int, str]]:
+    """Ordered patches from several sets; earlier sets win ties at the same offset"""
+    merged = []
+    for set_no, patch_set in enumerate(patch_sets):
+        for start, end, seq, text in patch_set.patches:
+            merged.append((start, end, (set_no, seq), text))
+    merged.sort(key=lambda p: (p[0], p[1], p[2]))
+
+    last_end = 0
+    for start, end, _, _ in merged:
+        if start < last_end:
+            raise ValueError(f"Overlapping patches at offset {start}")
+        last_end = max(last_end, end)
+    return merged
+
+class SourceBuffer:
+    """
+    Base source encoded once; patched copies are produced as a stream of
+    zero-copy memoryview slices plus patch texts.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.data = text.encode('utf-8')
+        self.view = memoryview(self.data)
+        self._ascii = len(self.data) == len(text)
+
+    def _byte_offsets(self, offsets: List[int]) -> List[int]:
+        """Char -> byte offsets (identity for ASCII); offsets must be sorted"""
+        if self._ascii:
+            return offsets
+        result = []
+        pos_char = pos_byte = 0
+        for offset in offsets:
+            pos_byte += len(self.text[pos_char:offset].encode('utf-8'))
+            pos_char = offset
+            result.append(pos_byte)
+        return result
+
+    def chunks(self, *patch_sets: PatchSet) -> Iterator[Union[memoryview, bytes]]:
+        merged = _merge(patch_sets)
+        bounds = self._byte_offsets([x for p in merged for x in (p[0], p[1])])
+
+        cursor = 0
+        for i, (_, _, _, text) in enumerate(merged):
+            start, end = bounds[2 * i], bounds[2 * i + 1]
+            if start > cursor:
+                yield self.view[cursor:start]
+            yield text.encode('utf-8')
+            cursor = max(cursor, end)
+        if cursor < len(self.data):
+            yield self.view[cursor:]
+
+    def write(self, target: Union[str, IO[bytes]], *patch_sets: PatchSet):
+        """Stream the patched source to a path or binary file object"""
+        if isinstance(target, str):
+            with open(target, 'wb') as f:
+                for chunk in self.chunks(*patch_sets):
+                    f.write(chunk)
+        else:
+            for chunk in self.chunks(*patch_sets):
+                target.write(chunk)
+
+    def render(self, *patch_sets: PatchSet) -> str:
+        out = io.BytesIO()
+        self.write(out, *patch_sets)
+        return out.getvalue().decode('utf-8')
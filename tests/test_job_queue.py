@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_queue import JobQueue, MAX_ATTEMPTS
+
+def test_claim_fails_job_after_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.db"))
+    queue.enqueue([(0, "a.sol", 1.0), (1, "b.sol", 0.0)])
+
+    # Every claim of a.sol "crashes": its lease is already expired
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        job = queue.claim("w", lease=-1)
+        assert job == {'file': "a.sol", 'position': 0, 'attempt': attempt}
+
+    job = queue.claim("w", lease=60)
+    assert job['file'] == "b.sol"
+    assert queue.claim("w", lease=60) is None
+
+    results = dict(queue.results())
+    assert results[0]['status'] == 'ERROR'
+
+def test_claim_returns_none_when_only_failed_jobs_remain(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.db"))
+    queue.enqueue([(0, "a.sol", 0.0)])
+    for _ in range(MAX_ATTEMPTS):
+        queue.claim("w", lease=-1)
+    assert queue.claim("w") is None
+    assert queue.unfinished() == 0
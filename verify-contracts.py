@@ -5,30 +5,49 @@ Verifies that all injected contracts can be compiled
 """
 
 import os
+import json
+import asyncio
+import contextlib
 import subprocess
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Optional
 
-def verify_contract(contract_path: str) -> Tuple[bool, str]:
+from compile_cache import CompileCache, BIN_ARGS, STANDARD_JSON_ARGS, DEFAULT_CACHE_DIR
+from results_store import ResultsStore
+from async_exec import run_process, run_async
+import profiling
+from profiling import span
+
+def verify_contract(contract_path: str, cache: Optional[CompileCache] = None) -> Tuple[bool, str]:
     """
     Verify single contract can be compiled
     Returns (success, error_message)
     """
+    if cache is not None:
+        entry = cache.get(contract_path, BIN_ARGS)
+        if entry is not None:
+            return entry['success'], entry['message']
+    
     try:
-        result = subprocess.run(
-            ['solc', '--bin', contract_path],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        with span('compile', file=os.path.basename(contract_path)):
+            result = subprocess.run(
+                ['solc'] + BIN_ARGS + [contract_path],
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
         
         if result.returncode == 0:
+            if cache is not None:
+                cache.put(contract_path, BIN_ARGS, True, "OK", result.stdout)
             return True, "OK"
         else:
             # Extract error message
             error = result.stderr
             # Get first error line for brevity
             first_error = error.split('\n')[0] if error else "Unknown error"
+            if cache is not None:
+                cache.put(contract_path, BIN_ARGS, False, first_error)
             return False, first_error
             
     except subprocess.TimeoutExpired:
@@ -36,14 +55,151 @@ def verify_contract(contract_path: str) -> Tuple[bool, str]:
     except Exception as e:
         return False, str(e)
 
+async def verify_contract_async(contract_path: str, cache: Optional[CompileCache] = None,
+                                limit: Optional[asyncio.Semaphore] = None) -> Tuple[bool, str]:
+    """
+    verify_contract on the asyncio backend; `limit` caps concurrent solc processes
+    """
+    if cache is not None:
+        entry = cache.get(contract_path, BIN_ARGS)
+        if entry is not None:
+            return entry['success'], entry['message']
+    
+    try:
+        async with limit or contextlib.nullcontext():
+            with span('compile', file=os.path.basename(contract_path)):
+                returncode, stdout, stderr, timed_out = await run_process(
+                    ['solc'] + BIN_ARGS + [contract_path], timeout=30)
+    except Exception as e:
+        return False, str(e)
+    
+    if timed_out:
+        return False, "Compilation timeout"
+    if returncode == 0:
+        if cache is not None:
+            cache.put(contract_path, BIN_ARGS, True, "OK", stdout)
+        return True, "OK"
+    # Get first error line for brevity
+    first_error = stderr.split('\n')[0] if stderr else "Unknown error"
+    if cache is not None:
+        cache.put(contract_path, BIN_ARGS, False, first_error)
+    return False, first_error
+
+async def verify_all_async(contract_paths: List[str], cache: Optional[CompileCache] = None,
+                           jobs: int = 64) -> Dict[str, Tuple[bool, str]]:
+    limit = asyncio.Semaphore(jobs)
+    outcomes = await asyncio.gather(*(verify_contract_async(p, cache, limit) for p in contract_paths))
+    return dict(zip(contract_paths, outcomes))
+
+def _first_error_line(error: Dict) -> str:
+    message = error.get('formattedMessage') or error.get('message') or "Unknown error"
+    return message.split('\n')[0]
+
+def verify_batch(contract_paths: List[str],
+                 cache: Optional[CompileCache] = None) -> Dict[str, Tuple[bool, str]]:
+    """
+    Verify many contracts with a single `solc --standard-json` call.
+    Only the ABI is requested, so solc runs full analysis but skips codegen.
+    Returns {path: (success, error_message)} like verify_contract.
+    """
+    results = {}
+    pending = []
+    
+    for path in contract_paths:
+        entry = cache.get(path, STANDARD_JSON_ARGS) if cache is not None else None
+        if entry is not None:
+            results[path] = (entry['success'], entry['message'])
+        else:
+            pending.append(path)
+    
+    while pending:
+        sources = {}
+        for path in pending:
+            with open(path, 'r', encoding='utf-8') as f:
+                sources[path] = {'content': f.read()}
+        
+        request = {
+            'language': 'Solidity',
+            'sources': sources,
+            'settings': {'outputSelection': {'*': {'*': ['abi']}}}
+        }
+        allow_paths = sorted({os.path.dirname(os.path.abspath(p)) for p in pending})
+        
+        try:
+            with span('compile batch', files=len(pending)):
+                proc = subprocess.run(
+                    ['solc', '--standard-json', '--allow-paths', ','.join(allow_paths)],
+                    input=json.dumps(request),
+                    capture_output=True,
+                    text=True,
+                    timeout=30 + len(pending)
+                )
+            output = json.loads(proc.stdout)
+        except Exception:
+            # Batch itself broke (timeout, bad JSON) -> fall back to one solc per file
+            for path in pending:
+                results[path] = verify_contract(path, cache)
+            return results
+        
+        failed = {}
+        unattributed = False
+        for error in output.get('errors', []):
+            if error.get('severity') != 'error':
+                continue
+            path = error.get('sourceLocation', {}).get('file')
+            if path in sources:
+                failed.setdefault(path, _first_error_line(error))
+            else:
+                unattributed = True
+        
+        if unattributed:
+            for path in pending:
+                results[path] = verify_contract(path, cache)
+            return results
+        
+        if not failed:
+            for path in pending:
+                results[path] = (True, "OK")
+                if cache is not None:
+                    cache.put(path, STANDARD_JSON_ARGS, True, "OK",
+                              output.get('contracts', {}).get(path))
+            return results
+        
+        # solc stops at the first failing stage for the whole batch, so the
+        # remaining files are not proven yet: record failures, re-run the rest.
+        for path, message in failed.items():
+            results[path] = (False, message)
+            if cache is not None:
+                cache.put(path, STANDARD_JSON_ARGS, False, message)
+        pending = [p for p in pending if p not in failed]
+    
+    return results
+
 def main():
     import sys
+    import argparse
     
-    if len(sys.argv) < 2:
-        print("Usage: python3 verify_contracts.py <contracts_dir>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Verify that contracts compile")
+    parser.add_argument("contracts_dir", help="Directory with .sol files")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="Compile N files per solc --standard-json call (0 = one solc per file)")
+    parser.add_argument("--async-jobs", type=int, default=0,
+                        help="Run up to N solc processes concurrently on the asyncio backend")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Compile cache directory")
+    parser.add_argument("--cache-max-mb", type=int, default=512, help="Evict cache entries above this size")
+    parser.add_argument("--no-cache", action="store_true", help="Always invoke solc")
+    parser.add_argument("--db", default=None, help="Record compile outcomes in this SQLite results store")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.from_args(args, "verify-contracts.py")
     
-    contracts_dir = sys.argv[1]
+    store = ResultsStore(args.db) if args.db else None
+    
+    cache = None
+    if not args.no_cache:
+        cache = CompileCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    
+    contracts_dir = args.contracts_dir
     
     if not os.path.exists(contracts_dir):
         print(f"[ERROR] Directory not found: {contracts_dir}")
@@ -64,18 +220,34 @@ def main():
     success_count = 0
     failed_contracts = []
     
-    for i, sol_file in enumerate(sol_files, 1):
-        contract_name = sol_file.name
-        print(f"[{i}/{len(sol_files)}] Verifying {contract_name}...", end=' ')
-        
-        success, message = verify_contract(str(sol_file))
+    with span('verify stage', cat='stage', files=len(sol_files)):
+        batch_results = {}
+        if args.async_jobs > 0 and args.batch_size <= 0:
+            batch_results = run_async(verify_all_async([str(f) for f in sol_files], cache, args.async_jobs))
         
-        if success:
-            print("✓ OK")
-            success_count += 1
-        else:
-            print(f"✗ FAILED")
-            failed_contracts.append((contract_name, message))
+        for i, sol_file in enumerate(sol_files, 1):
+            contract_name = sol_file.name
+            
+            if args.batch_size > 0 and str(sol_file) not in batch_results:
+                batch = [str(f) for f in sol_files[i - 1:i - 1 + args.batch_size]]
+                batch_results = verify_batch(batch, cache)
+            
+            print(f"[{i}/{len(sol_files)}] Verifying {contract_name}...", end=' ')
+            
+            if args.batch_size > 0 or args.async_jobs > 0:
+                success, message = batch_results[str(sol_file)]
+            else:
+                success, message = verify_contract(str(sol_file), cache)
+            
+            if store is not None:
+                store.add_compile(contract_name, success, message)
+            
+            if success:
+                print("✓ OK")
+                success_count += 1
+            else:
+                print(f"✗ FAILED")
+                failed_contracts.append((contract_name, message))
     
     # Summary
     print("\n" + "=" * 60)
@@ -85,6 +257,9 @@ def main():
     print(f"✓ Successful:        {success_count}")
     print(f"✗ Failed:            {len(failed_contracts)}")
     print(f"Success rate:        {success_count/len(sol_files)*100:.1f}%")
+    if cache is not None:
+        print(f"Cache hits:          {cache.hits}/{cache.hits + cache.misses}")
+        cache.evict()
     
     # Show failed contracts
     if failed_contracts: